@@ -1,16 +1,27 @@
 """
 Module for running batch simulations with multiple parameter combinations
-Edit the param_combinations list to define your parameter grid
+Edit explicit_combinations and param_grid_spec to define your runs
 """
 
 import os
+import glob
 import time
 import logging
 import shutil
 import copy
-from main import setup_logging, get_params_dict
+import itertools
+import re
+import json
+import hashlib
+from collections import ChainMap
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from main import setup_logging, close_logging, get_params_dict
 from single_run import run_single_simulation
 from plots import create_all_plots
+from export import SimulationLogbook
+from terminal_ui import print_system_info
+from naming import generate_run_directory
 import config
 
 
@@ -23,11 +34,64 @@ import config
 # "detailed" -> baseline_run_20231115_143022_batch001_mytest_baseline  
 BATCH_NAMING_MODE = "detailed"
 
+# Number of simulations to run in parallel:
+# None -> os.cpu_count() // config.threads
+# 1    -> sequential, in the current working directory
+BATCH_WORKERS = None
+
+# Files copied from the launch directory into the private work directory
+# of each parallel run (BATCH_WORKERS > 1). Only these pre-made inputs are
+# available there: everything else RADMC-3D reads (radmc3d.inp,
+# amr_grid.inp, dustopac.inp, ...) is written by the setup of the run
+# itself. Add patterns here if a model needs further input files.
+WORK_DIR_INPUTS = ("dustkappa_*.inp", "dustkapscatmat_*.inp", "dustkapalignfact_*.inp")
+
+# Skip combinations the logbook already lists as successful (same parameters,
+# config.py and run settings), e.g. after an interrupted batch
+# (python main.py ... --resume turns it on for a single call)
+BATCH_RESUME = False
+
+# Expected types of commonly swept parameters, checked before the batch starts
+# (str where radmc3dPy evaluates expressions like "0.01*ms")
+PARAM_TYPES = {
+    'mdisk': (str, float, int),
+    'rin': (str, float, int),
+    'rdisk': (str, float, int),
+    'hrdisk': (float, int),
+    'plh': (float, int),
+    'plsig1': (float, int),
+    'hrpivot': (str, float, int),
+    'h_spiral_amp': (float, int),
+    'sig_spiral_amp': (float, int),
+    'spiral_pitch': (float, int),
+    'n_arms': (int,),
+    'h_vortex_amp': (list, tuple),
+    'sig_vortex_amp': (list, tuple),
+    'nphot': (float, int),
+    'nphot_scat': (float, int),
+    'nphot_spec': (float, int),
+}
+
+# Value checks: parameter -> (predicate, description)
+PARAM_CHECKS = {
+    'hrdisk': (lambda v: v > 0, "must be > 0"),
+    'n_arms': (lambda v: v >= 0, "must be >= 0"),
+    'h_spiral_amp': (lambda v: v >= 0, "must be >= 0"),
+    'sig_spiral_amp': (lambda v: v >= 0, "must be >= 0"),
+    'nphot': (lambda v: v > 0, "must be > 0"),
+    'nphot_scat': (lambda v: v > 0, "must be > 0"),
+    'nphot_spec': (lambda v: v > 0, "must be > 0"),
+}
+
+# Characters dropped from parameter values when building name suffixes
+_SUFFIX_UNSAFE = re.compile(r'[^\w.\-]')
+
 ###############################################
 ### DEFINE YOUR PARAMETER COMBINATIONS HERE ###
 ###############################################
 
-param_combinations = [
+# Individual runs, each with its own set of overrides
+explicit_combinations = [
     # Example 1: Baseline model
     {
         "name_suffix": "baseline",
@@ -86,34 +150,80 @@ param_combinations = [
     # Add more combinations as needed...
 ]
 
+# Parameter grid, run in addition to the list above (set to {} for none).
+# Each key is a parameter from config.py:
+#   list  -> values to sweep over (the batch runs the Cartesian product)
+#   other -> constant, applied to every combination
+# List-valued parameters (e.g. sig_vortex_amp) must be wrapped in another
+# list to be swept: "sig_vortex_amp": [[0.0, 0.0], [0.5, 0.5]]
+#
+# Example (12 runs: weak and strong spiral for 1, 3 and 4 arms):
+#   param_grid_spec = {
+#       "mdisk": "0.01*ms",
+#       "hrdisk": 0.117,
+#       "h_spiral_amp": [0.1, 0.2],
+#       "sig_spiral_amp": [0.2, 0.5],
+#       "n_arms": [1, 3, 4],
+#       "spiral_pitch": 1.0,
+#   }
+param_grid_spec = {}
+
+# Optional filter: return False to drop a combination from the product
+# (set to None to run the full grid)
+# Example: only the weak (0.1/0.2) and strong (0.2/0.5) spiral of the grid above
+#   param_grid_filter = lambda p: (p["h_spiral_amp"] == 0.1) == (p["sig_spiral_amp"] == 0.2)
+param_grid_filter = None
+
 
 ########################
 ### HELPER FUNCTIONS ###
 ########################
 
+# Read-only base parameters of the current batch, set once per process
+# by _init_base_params (in the parent and in every worker)
+_BASE_PARAMS = MappingProxyType({})
+
+# Arguments shared by all runs of the batch, set once per worker by _worker_init
+_BATCH_CONTEXT = MappingProxyType({})
+
+
+def _init_base_params(base_params):
+    """
+    Freeze the base parameters for this process
+    
+    Also used as the ProcessPoolExecutor initializer, so the base
+    parameters are sent to each worker once instead of with every task.
+    
+    Parameters:
+    -----------
+    base_params : dict
+        Base parameter dictionary from config
+    """
+    global _BASE_PARAMS
+    _BASE_PARAMS = MappingProxyType(dict(base_params))
+
+
 def merge_params(base_params, override_params):
     """
     Merge base parameters with override parameters
     
     Parameters:
     -----------
-    base_params : dict
+    base_params : dict or MappingProxyType
         Base parameter dictionary from config
     override_params : dict
         Parameters to override
         
     Returns:
     --------
-    dict with merged parameters
+    ChainMap with merged parameters
+    (overrides first, lookups fall through to base_params without copying it;
+    writes only touch the override layer)
     """
-    # Use simple dict copy instead of deepcopy to avoid module pickling issues
-    merged = base_params.copy()
-    
     # Don't merge the name_suffix into params
     override = {k: v for k, v in override_params.items() if k != 'name_suffix'}
-    merged.update(override)
     
-    return merged
+    return ChainMap(override, base_params)
 
 
 def create_batch_run_directory(base_name, name_suffix, params, batch_idx, base_timestamp):
@@ -144,156 +254,537 @@ def create_batch_run_directory(base_name, name_suffix, params, batch_idx, base_t
     """
     
     timestamp = base_timestamp + f"_batch{batch_idx:03d}"
+    base_dir = "../../Simulations/Batch"
     
     if BATCH_NAMING_MODE == "simple":
         # Simple format: basename_suffix_batchXXX
         run_name = f"{base_name}_{name_suffix}_batch{batch_idx:03d}"
-        base_dir = "../../Simulations/Batch"
         run_dir = os.path.join(base_dir, run_name)
     else:
         # Detailed format: uses naming.py with full categorization
-        from naming import generate_run_directory
         combined_name = f"{base_name}_{name_suffix}"
-        base_dir = "../../Simulations/Batch"
         run_dir, run_name = generate_run_directory(base_dir, combined_name, params, timestamp)
     
     return run_dir, run_name, timestamp
 
 
+def expand_param_grid(spec, filter_fn=None):
+    """
+    Expand a parameter grid specification into a list of combinations
+    
+    Parameters:
+    -----------
+    spec : dict
+        Parameter name -> list of values to sweep, or a constant value
+    filter_fn : callable, optional
+        Called with each combination dict, combinations for which
+        it returns False are dropped
+        
+    Returns:
+    --------
+    list of dicts in the param_combinations format, each with an
+    auto-generated name_suffix built from the swept parameters
+    """
+    if not spec:
+        return []
+    
+    axes = {k: (v if isinstance(v, list) else [v]) for k, v in spec.items()}
+    varying = [k for k, values in axes.items() if len(values) > 1]
+    
+    combinations = []
+    for values in itertools.product(*axes.values()):
+        combo = dict(zip(axes.keys(), values))
+        if filter_fn is not None and not filter_fn(combo):
+            continue
+        
+        # e.g. "mdisk0.01ms_hrdisk0.117"
+        suffix = "_".join(f"{k}{_SUFFIX_UNSAFE.sub('', str(combo[k]))}" for k in varying)
+        combo['name_suffix'] = suffix or "grid"
+        combinations.append(combo)
+    
+    return combinations
+
+
+param_combinations = explicit_combinations + expand_param_grid(param_grid_spec, filter_fn=param_grid_filter)
+
+
+def combo_hash(param_combo, config_source=b"", run_inputs=None):
+    """
+    Stable short hash identifying a parameter combination
+    
+    Parameters:
+    -----------
+    param_combo : dict
+        Entry of param_combinations
+    config_source : bytes
+        Content of config.py, so a changed base config is not mistaken
+        for an already completed run
+    run_inputs : dict, optional
+        Run settings that change the output (images, wavelength, reference
+        SED, naming mode), so e.g. re-running a batch with images is not
+        skipped
+        
+    Returns:
+    --------
+    str with 12 hex digits
+    """
+    h = hashlib.blake2b(config_source, digest_size=16)
+    h.update(json.dumps([param_combo, run_inputs], sort_keys=True, default=str).encode())
+    return h.hexdigest()[:12]
+
+
+def completed_combo_hashes():
+    """
+    Hashes of all combinations logged as successful in the logbook
+    """
+    df = SimulationLogbook().search(columns=['ComboHash'], Status='SUCCESS')
+    if df is None:
+        return set()
+    return set(df['ComboHash'].dropna()) - {''}
+
+
+def validate_all(combinations, base_params):
+    """
+    Check all parameter combinations before any simulation starts
+    
+    Parameters:
+    -----------
+    combinations : list of dicts
+        Entries of param_combinations
+    base_params : dict
+        Base parameter dictionary from config
+        
+    Returns:
+    --------
+    list of error messages (empty if all combinations are valid)
+    """
+    errors = []
+    for idx, combo in enumerate(combinations, start=1):
+        label = f"[{idx}] {combo.get('name_suffix', f'combo_{idx}')}"
+        for key, value in combo.items():
+            if key == 'name_suffix':
+                continue
+            
+            # Catch typos in parameter names
+            if key not in base_params:
+                errors.append(f"{label}: unknown parameter '{key}'")
+                continue
+            
+            expected = PARAM_TYPES.get(key)
+            if expected and not isinstance(value, expected):
+                names = " or ".join(t.__name__ for t in expected)
+                errors.append(f"{label}: {key} = {value!r} should be {names}")
+                continue
+            
+            check = PARAM_CHECKS.get(key)
+            if check and not isinstance(value, str) and not check[0](value):
+                errors.append(f"{label}: {key} = {value!r} {check[1]}")
+    
+    return errors
+
+
+def make_directories(paths):
+    """
+    Create all directories of a batch in one pass
+    
+    Parents are created before their children, so after the first
+    directory a single mkdir per path is enough.
+    
+    Parameters:
+    -----------
+    paths : list of str
+        Directories to create (duplicates are ignored)
+    """
+    for path in sorted(set(paths)):
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            os.makedirs(path, exist_ok=True)
+
+
 ###########################
 ### BATCH RUN EXECUTION ###
 ###########################
 
-def run_batch_mode(user_inputs, base_timestamp):
+def _run_one(idx, param_combo, run_dir, run_name, timestamp, user_inputs,
+             saved_scripts, threads, n_total, isolate=False):
     """
-    Execute batch runs with multiple parameter combinations
+    Run a single parameter combination of the batch
+    
+    Kept at module level so it can be pickled and sent to worker processes.
+    The base parameters come from _BASE_PARAMS (see _init_base_params).
     
     Parameters:
     -----------
+    idx : int
+        Batch index (1, 2, 3, ...)
+    param_combo : dict
+        Entry of param_combinations
+    run_dir : str
+        Run directory (already created)
+    run_name : str
+        Run name
+    timestamp : str
+        Timestamp with batch number
     user_inputs : dict
         User input configuration from main.py
-    base_timestamp : str
-        Base timestamp string
+    saved_scripts : dict
+        Script name (without .py) -> file content, saved to the run directory
+    threads : int
+        Number of RADMC-3D threads for this run
+    n_total : int
+        Total number of simulations in the batch
+    isolate : bool
+        Run inside a private working directory (required when several
+        simulations run concurrently, RADMC-3D writes into the cwd)
+        
+    Returns:
+    --------
+    result : dict
+        Entry for the results summary
     """
     
-    base_name = user_inputs['name']
     make_images = user_inputs['make_images']
     wavelength = user_inputs['wavelength']
     reference_sed = user_inputs['reference_sed']
-    ui_mode = user_inputs['ui_mode'] 
+    ui_mode = user_inputs['ui_mode']
     
-    print("\n" + "="*60)
-    print(f"BATCH MODE: Running {len(param_combinations)} simulations")
-    print(f"Naming mode: {BATCH_NAMING_MODE}")
-    print("="*60 + "\n")
+    # Get name suffix
+    name_suffix = param_combo.get('name_suffix', f'combo_{idx}')
     
-    # Get base parameters from config
-    base_params = get_params_dict()
+    # Merge parameters; config.threads is lowered to this run's share of
+    # the CPUs (written to the override layer, the base stays untouched)
+    params = merge_params(_BASE_PARAMS, param_combo)
+    params['threads'] = threads
     
-    # Track overall batch timing
-    batch_start_time = time.time()
-    results_summary = []
+    launch_dir = os.getcwd()
+    work_dir = None
+    log_handler = None
+    run_start_time = time.time()
     
-    # Loop over all parameter combinations
-    for idx, param_combo in enumerate(param_combinations, start=1):
+    try:
+        if isolate:
+            # Each worker gets its own scratch directory so the RADMC-3D input
+            # and output files of concurrent runs do not overwrite each other
+            run_dir = os.path.abspath(run_dir)
+            work_dir = os.path.join(run_dir, "work")
+            for pattern in WORK_DIR_INPUTS:
+                for input_file in glob.glob(os.path.join(launch_dir, pattern)):
+                    shutil.copy(input_file, work_dir)
+            if reference_sed is not None:
+                reference_sed = os.path.abspath(reference_sed)
+            os.chdir(work_dir)
         
-        print(f"\n{'='*60}")
-        print(f"Batch Progress: Simulation {idx}/{len(param_combinations)}")
-        print(f"Configuration: {param_combo.get('name_suffix', 'unnamed')}")
-        print(f"{'='*60}\n")
+        # Setup logging (own log file per run, written by a background thread)
+        log_handler = setup_logging(run_dir, run_name, timestamp)
         
-        # Get name suffix
-        name_suffix = param_combo.get('name_suffix', f'combo_{idx}')
+        logging.info(f"Batch run {idx}/{n_total}: {run_name}")
+        logging.info(f"Making Images = {make_images}")
+        if make_images:
+            logging.info(f"Image wavelength = {wavelength} µm")
         
-        # Merge parameters
-        params = merge_params(base_params, param_combo)
+        # Log parameter changes (one line per run)
+        logging.info("Modified parameters: %s",
+                     json.dumps({k: v for k, v in param_combo.items() if k != 'name_suffix'}, default=str))
         
-        # Create run directory with appropriate naming
-        run_dir, run_name, timestamp = create_batch_run_directory(
-            base_name, name_suffix, params, idx, base_timestamp
+        # Run simulation (a real dict: run_single_simulation may copy,
+        # serialize or edit it)
+        spec, star, grid = run_single_simulation(
+            params=dict(params),
+            run_dir=run_dir,
+            name=run_name,
+            timestamp=timestamp,
+            make_images=make_images,
+            wavelength=wavelength,
+            threads=threads,
+            ui_mode=ui_mode
         )
         
-        # Create directory
-        os.makedirs(run_dir, exist_ok=True)
+        # Create plots
+        create_all_plots(
+            run_dir=run_dir,
+            name=run_name,
+            timestamp=timestamp,
+            pc=config.pc,
+            wav=wavelength,
+            reference_file=reference_sed
+        )
         
-        # Setup logging
-        setup_logging(run_dir, run_name, timestamp)
+        # Save configuration files
+        for script, content in saved_scripts.items():
+            with open(os.path.join(run_dir, f"{script}_{run_name}_{timestamp}.py"), 'wb') as f:
+                f.write(content)
         
-        logging.info(f"Batch run {idx}/{len(param_combinations)}: {run_name}")
-        logging.info(f"Making Images = {make_images}")
-        if make_images:
-            logging.info(f"Image wavelength = {wavelength} µm")
+        run_end_time = time.time()
+        runtime = (run_end_time - run_start_time) / 60
         
-        # Log parameter changes
-        logging.info("Modified parameters:")
-        for key, value in param_combo.items():
-            if key != 'name_suffix':
-                logging.info(f"  {key} = {value}")
+        logging.info(f"Runtime: {runtime:.2f} minutes")
         
-        # Run simulation
-        run_start_time = time.time()
+        return {
+            'index': idx,
+            'name': run_name,
+            'timestamp': timestamp,
+            'suffix': name_suffix,
+            'runtime': runtime,
+            'status': 'SUCCESS',
+            'dir': run_dir
+        }
         
-        try:
-            spec, star, grid = run_single_simulation(
-                params=params,
-                run_dir=run_dir,
-                name=run_name,
-                timestamp=timestamp,
-                make_images=make_images,
-                wavelength=wavelength,
-                threads=config.threads,
-                ui_mode=ui_mode
-            )
-            
-            # Create plots
-            create_all_plots(
-                run_dir=run_dir,
-                name=run_name,
-                timestamp=timestamp,
-                pc=config.pc,
-                wav=wavelength,
-                reference_file=reference_sed
-            )
-            
-            # Save configuration files
-            if os.path.exists("config.py"):
-                shutil.copy("config.py", os.path.join(run_dir, f"config_{run_name}_{timestamp}.py"))
-            if os.path.exists("batch_run.py"):
-                shutil.copy("batch_run.py", os.path.join(run_dir, f"batch_run_{run_name}_{timestamp}.py"))
-            
-            run_end_time = time.time()
-            runtime = (run_end_time - run_start_time) / 60
-            
-            logging.info(f"Runtime: {runtime:.2f} minutes")
-            
-            results_summary.append({
-                'index': idx,
-                'name': run_name,
-                'suffix': name_suffix,
-                'runtime': runtime,
-                'status': 'SUCCESS',
-                'dir': run_dir
-            })
-            
-            print(f"\n✓ Simulation {idx} completed successfully in {runtime:.2f} minutes")
-            
-        except Exception as e:
-            run_end_time = time.time()
-            runtime = (run_end_time - run_start_time) / 60
-            
-            error_msg = f"ERROR in simulation {idx}: {str(e)}"
-            logging.error(error_msg)
-            print(f"\n✗ {error_msg}")
-            
-            results_summary.append({
+    except Exception as e:
+        run_end_time = time.time()
+        runtime = (run_end_time - run_start_time) / 60
+        
+        error_msg = f"ERROR in simulation {idx}: {str(e)}"
+        logging.error(error_msg)
+        
+        return {
+            'index': idx,
+            'name': run_name,
+            'timestamp': timestamp,
+            'suffix': name_suffix,
+            'runtime': runtime,
+            'status': 'FAILED',
+            'error': str(e),
+            'dir': run_dir
+        }
+    
+    finally:
+        # Detach this run's log file and write out pending records
+        if log_handler is not None:
+            close_logging(log_handler)
+        # Always return to the launch directory, also after a failed setup,
+        # so the next run in this worker does not start inside a work dir
+        if os.getcwd() != launch_dir:
+            os.chdir(launch_dir)
+        if work_dir is not None:
+            # The Save phase copied what is kept into run_dir; drop the
+            # RADMC-3D scratch files (.inp, .bdat, ...) of this run
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _worker_init(base_params, user_inputs, saved_scripts, threads, n_total):
+    """
+    ProcessPoolExecutor initializer: one-time setup of a worker process
+    
+    Everything that is the same for all runs of the batch is sent to each
+    worker once here, so the submitted tasks only carry the per-run values.
+    """
+    global _BATCH_CONTEXT
+    _init_base_params(base_params)
+    _BATCH_CONTEXT = MappingProxyType({
+        'user_inputs': user_inputs,
+        'saved_scripts': saved_scripts,
+        'threads': threads,
+        'n_total': n_total,
+    })
+
+
+def _run_in_worker(idx, param_combo, run_dir, run_name, timestamp):
+    """Run one combination in a worker process set up by _worker_init"""
+    return _run_one(idx, param_combo, run_dir, run_name, timestamp,
+                    isolate=True, **_BATCH_CONTEXT)
+
+
+def _report_result(result):
+    """Print the outcome of one finished simulation"""
+    if result['status'] == 'SUCCESS':
+        print(f"\n✓ Simulation {result['index']} completed successfully in {result['runtime']:.2f} minutes")
+    else:
+        print(f"\n✗ ERROR in simulation {result['index']}: {result['error']}")
+
+
+def _log_result(logbook, result, base_params, threads):
+    """Add one finished simulation to the central logbook"""
+    params = merge_params(base_params, param_combinations[result['index'] - 1])
+    params['threads'] = threads
+    
+    # Only runs whose simulation and plots both completed get the hash,
+    # anything else is run again on resume
+    combo_hash = result.get('combo_hash') if result['status'] == 'SUCCESS' else None
+    
+    logbook.add_simulation(
+        params, result['dir'], result['name'], result['timestamp'], result['runtime'],
+        status=result['status'], error_msg=result.get('error'),
+        combo_hash=combo_hash
+    )
+
+
+def run_batch_mode(user_inputs, base_timestamp):
+    """
+    Execute batch runs with multiple parameter combinations
+    
+    With more than one worker the combinations are dispatched to a
+    process pool, each worker running with a share of the available threads.
+    
+    Parameters:
+    -----------
+    user_inputs : dict
+        User input configuration from main.py
+        Optional keys 'batch_workers' and 'resume' override
+        BATCH_WORKERS and BATCH_RESUME (None keeps the module setting)
+    base_timestamp : str
+        Base timestamp string
+    """
+    
+    base_name = user_inputs['name']
+    n_total = len(param_combinations)
+    
+    print("\n" + "="*60)
+    print(f"BATCH MODE: Running {n_total} simulations")
+    print(f"Naming mode: {BATCH_NAMING_MODE}")
+    print("="*60 + "\n")
+    
+    # System resources once for the whole batch, not per model
+    print_system_info()
+    
+    # Get base parameters from config (read-only, shared by all combinations)
+    _init_base_params(get_params_dict(config))
+    base_params = _BASE_PARAMS
+    
+    # Fail fast: do not start the batch if any combination is invalid
+    errors = validate_all(param_combinations, base_params)
+    if errors:
+        raise SystemExit("Invalid parameter combinations, batch not started:\n  "
+                         + "\n  ".join(errors))
+    
+    # Read the scripts saved with every run once for the whole batch
+    saved_scripts = {}
+    for script in ("config", "batch_run"):
+        if os.path.exists(f"{script}.py"):
+            with open(f"{script}.py", 'rb') as f:
+                saved_scripts[script] = f.read()
+    
+    # Resume: skip combinations that already succeeded with the same config
+    # and the same run settings
+    run_inputs = {
+        'make_images': user_inputs['make_images'],
+        'wavelength': user_inputs['wavelength'],
+        'reference_sed': user_inputs['reference_sed'],
+        'naming_mode': BATCH_NAMING_MODE,
+    }
+    combo_hashes = {
+        idx: combo_hash(param_combo, saved_scripts.get("config", b""), run_inputs)
+        for idx, param_combo in enumerate(param_combinations, start=1)
+    }
+    resume = user_inputs.get('resume')
+    if resume is None:
+        resume = BATCH_RESUME
+    done = completed_combo_hashes() if resume else set()
+    
+    # Compute all run directories up front and create them in one pass
+    runs = []
+    skipped = []
+    for idx, param_combo in enumerate(param_combinations, start=1):
+        name_suffix = param_combo.get('name_suffix', f'combo_{idx}')
+        run_dir, run_name, timestamp = create_batch_run_directory(
+            base_name, name_suffix, merge_params(base_params, param_combo), idx, base_timestamp
+        )
+        if combo_hashes[idx] in done:
+            skipped.append({
                 'index': idx,
                 'name': run_name,
+                'timestamp': timestamp,
                 'suffix': name_suffix,
-                'runtime': runtime,
-                'status': 'FAILED',
-                'error': str(e),
-                'dir': run_dir
+                'runtime': 0.0,
+                'status': 'SKIPPED',
+                'dir': '(already completed, see logbook)'
             })
+            continue
+        runs.append((idx, param_combo, run_dir, run_name, timestamp))
+    runs = tuple(runs)
+    
+    if skipped:
+        print(f"Skipping {len(skipped)} combinations already completed (see logbook):")
+        for result in skipped:
+            print(f"  - [{result['index']:2d}] {result['suffix']}")
+        print()
+    
+    # Size the worker pool so the batch does not oversubscribe the CPUs
+    cpu_count = os.cpu_count() or 1
+    workers = user_inputs.get('batch_workers', BATCH_WORKERS)
+    if workers is None:
+        workers = cpu_count // max(1, config.threads)
+    workers = max(1, min(workers, len(runs)))
+    threads = max(1, min(config.threads, cpu_count // workers))
+    print(f"Workers: {workers} ({threads} threads each)\n")
+    
+    # Concurrent runs cannot share one terminal for their live progress displays
+    if workers > 1 and user_inputs['ui_mode'] == 'advanced':
+        print("Advanced UI is not available with several workers, using raw output\n")
+        user_inputs = {**user_inputs, 'ui_mode': 'raw'}
+    
+    summary_dir = os.path.join("../../Simulations/Batch", f"batch_{base_timestamp}_{base_name}")
+    batch_dirs = [summary_dir] + [run[2] for run in runs]
+    if workers > 1:
+        batch_dirs += [os.path.join(run[2], "work") for run in runs]
+    make_directories(batch_dirs)
+    
+    # Track overall batch timing
+    batch_start_time = time.time()
+    results_summary = list(skipped)
+    
+    # Logbook rows are written from this process as runs finish, by the
+    # logbook's background writer; every finished run is also appended to
+    # progress.ndjson right away, so a killed batch leaves a record too
+    progress_file = os.path.join(summary_dir, "progress.ndjson")
+    with SimulationLogbook() as logbook, open(progress_file, 'a', buffering=1) as progress:
+        for result in skipped:
+            progress.write(json.dumps(result, default=str) + "\n")
+        
+        if workers == 1:
+            # Sequential: run in-process in the current working directory
+            for idx, param_combo, run_dir, run_name, timestamp in runs:
+                
+                print(f"\n{'='*60}")
+                print(f"Batch Progress: Simulation {idx}/{n_total}")
+                print(f"Configuration: {param_combo.get('name_suffix', 'unnamed')}")
+                print(f"{'='*60}\n")
+                
+                result = _run_one(idx, param_combo, run_dir, run_name, timestamp,
+                                  user_inputs, saved_scripts, threads, n_total)
+                result['combo_hash'] = combo_hashes[idx]
+                results_summary.append(result)
+                progress.write(json.dumps(result, default=str) + "\n")
+                _report_result(result)
+                _log_result(logbook, result, base_params, threads)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_worker_init,
+                initargs=(dict(base_params), user_inputs, saved_scripts, threads, n_total)
+            ) as executor:
+                futures = {executor.submit(_run_in_worker, *run): run for run in runs}
+                
+                for n_done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # The worker itself died (e.g. killed for running out of
+                        # memory): record the run as failed and keep collecting
+                        idx, param_combo, run_dir, run_name, timestamp = futures[future]
+                        result = {
+                            'index': idx,
+                            'name': run_name,
+                            'timestamp': timestamp,
+                            'suffix': param_combo.get('name_suffix', f'combo_{idx}'),
+                            'runtime': 0.0,
+                            'status': 'FAILED',
+                            'error': f"worker process failed: {e!r}",
+                            'dir': run_dir
+                        }
+                    result['combo_hash'] = combo_hashes[result['index']]
+                    results_summary.append(result)
+                    progress.write(json.dumps(result, default=str) + "\n")
+                    _report_result(result)
+                    _log_result(logbook, result, base_params, threads)
+                    print(f"Batch Progress: {n_done}/{len(runs)} simulations finished")
+    
+    # Rebuild the Excel logbook once, now that all rows of the batch are written
+    logbook.compile()
+    
+    # Keep the summary in batch order
+    results_summary.sort(key=lambda r: r['index'])
     
     # Batch completion summary
     batch_end_time = time.time()
@@ -302,15 +793,16 @@ def run_batch_mode(user_inputs, base_timestamp):
     print("\n" + "="*60)
     print("BATCH RUN COMPLETED")
     print("="*60)
-    print(f"\nTotal simulations: {len(param_combinations)}")
+    print(f"\nTotal simulations: {n_total}")
     print(f"Successful: {sum(1 for r in results_summary if r['status'] == 'SUCCESS')}")
     print(f"Failed: {sum(1 for r in results_summary if r['status'] == 'FAILED')}")
+    print(f"Skipped (already completed): {len(skipped)}")
     print(f"Total runtime: {total_runtime:.2f} minutes ({total_runtime/60:.2f} hours)")
     print("\nResults summary:")
     print("-" * 60)
     
     for result in results_summary:
-        status_symbol = "✓" if result['status'] == 'SUCCESS' else "✗"
+        status_symbol = {'SUCCESS': "✓", 'SKIPPED': "-"}.get(result['status'], "✗")
         print(f"{status_symbol} [{result['index']:2d}] {result['suffix']:20s} - "
               f"{result['runtime']:6.2f} min - {result['status']}")
         if result['status'] == 'FAILED':
@@ -319,9 +811,6 @@ def run_batch_mode(user_inputs, base_timestamp):
     print("-" * 60)
     
     # Save summary to file
-    summary_dir = os.path.join("../../Simulations/Batch", f"batch_{base_timestamp}_{base_name}")
-    os.makedirs(summary_dir, exist_ok=True)
-    
     summary_file = os.path.join(summary_dir, "batch_summary.txt")
     with open(summary_file, 'w') as f:
         f.write("BATCH RUN SUMMARY\n")
@@ -329,9 +818,10 @@ def run_batch_mode(user_inputs, base_timestamp):
         f.write(f"Base name: {base_name}\n")
         f.write(f"Timestamp: {base_timestamp}\n")
         f.write(f"Naming mode: {BATCH_NAMING_MODE}\n")
-        f.write(f"Total simulations: {len(param_combinations)}\n")
+        f.write(f"Total simulations: {n_total}\n")
         f.write(f"Successful: {sum(1 for r in results_summary if r['status'] == 'SUCCESS')}\n")
         f.write(f"Failed: {sum(1 for r in results_summary if r['status'] == 'FAILED')}\n")
+        f.write(f"Skipped (already completed): {len(skipped)}\n")
         f.write(f"Total runtime: {total_runtime:.2f} minutes ({total_runtime/60:.2f} hours)\n\n")
         f.write("Individual results:\n")
         f.write("-"*60 + "\n")
@@ -346,6 +836,7 @@ def run_batch_mode(user_inputs, base_timestamp):
                 f.write(f"    Error: {result.get('error', 'Unknown error')}\n")
     
     print(f"\nBatch summary saved to: {summary_file}")
+    print(f"Per-run progress log: {progress_file}")
     print("="*60 + "\n")
 
 
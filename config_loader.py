@@ -5,6 +5,8 @@ Allows loading reference configurations or custom config files
 
 import sys
 import os
+import functools
+import inspect
 import importlib.util
 
 
@@ -89,16 +91,27 @@ def load_config(config_name=None):
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Config file not found: {config_path}")
     
-    # Load the module
-    spec = importlib.util.spec_from_file_location(module_name, config_path)
-    config_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(config_module)
+    # The modification time is part of the cache key, so an edited
+    # config file is executed again
+    config_module = _load_module(os.path.abspath(config_path), module_name,
+                                 os.stat(config_path).st_mtime_ns)
     
     print(f"Loaded configuration: {config_path}")
     
     return config_module
 
 
+@functools.lru_cache(maxsize=None)
+def _load_module(config_path, module_name, mtime_ns):
+    """
+    Execute a config file (once per path and modification time)
+    """
+    spec = importlib.util.spec_from_file_location(module_name, config_path)
+    config_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config_module)
+    return config_module
+
+
 def get_params_dict_from_config(config_module):
     """
     Extract parameters from a config module
@@ -111,16 +124,22 @@ def get_params_dict_from_config(config_module):
     Returns:
     --------
     params : dict
-        Dictionary of parameters
+        Dictionary of parameters (a fresh copy, the scan itself is cached
+        per config module)
+    """
+    return dict(_scan_params(config_module))
+
+
+@functools.lru_cache(maxsize=None)
+def _scan_params(config_module):
+    """
+    Collect the parameters of a config module (skips dunders and module imports)
     """
-    params = {}
-    for key in dir(config_module):
-        if not key.startswith('__'):
-            value = getattr(config_module, key)
-            # Skip module imports
-            if not str(type(value)).startswith("<class 'module'>"):
-                params[key] = value
-    return params
+    module_vars = vars(config_module)
+    return {
+        key: module_vars[key] for key in sorted(module_vars)
+        if not key.startswith('__') and not inspect.ismodule(module_vars[key])
+    }
 
 
 def copy_config_to_run_dir(config_path, run_dir, run_name, timestamp):
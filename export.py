@@ -1,26 +1,207 @@
 """
 Module for logging all simulations to a central Excel/CSV file
-Each simulation appends its parameters to the logbook
+Each simulation appends its parameters to the logbook as a small
+Parquet part file; the Excel logbook is compiled from the parts and
+CSV is only written on demand (export_to_csv)
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as ds
+import openpyxl
 import os
+import glob
+import ast
 import json
+import math
+import functools
+import operator
+import queue
+import threading
+import time
 from datetime import datetime
-from filelock import FileLock
 import warnings
 
 # Suppress openpyxl warnings
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
 
 
+# Logbook columns taken from the simulation parameters, in logbook order
+PARAM_COLUMNS = (
+    # Stellar parameters
+    'tstar', 'rstar', 'mstar', 'istar_sphere', 'pc', 'incl',
+    
+    # Disk parameters
+    'mdisk', 'rin', 'rdisk', 'hrdisk', 'plsig1', 'plh', 'hrpivot', 'sigma_type', 'sig0',
+    
+    # Inner rim parameters
+    'hpr_prim_rout', 'prim_rout', 'srim_rout', 'srim_plsig',
+    
+    # Dust parameters
+    'dustkappa', 'gsmax', 'gsmin', 'mixabun',
+    
+    # Grid parameters
+    'wbound', 'nw', 'xbound', 'nx', 'ybound', 'ny', 'zbound', 'nz',
+    
+    # Computational parameters
+    'nphot', 'nphot_scat', 'nphot_spec', 'threads', 'modified_random_walk',
+    'scattering_mode_max', 'mc_scat_maxtauabs',
+    
+    # Image parameters
+    'npix', 'phi', 'sizeau', 'nostar',
+    
+    # Spiral parameters
+    'h_spiral_amp', 'sig_spiral_amp', 'spiral_pitch', 'n_arms', 'spiral_width_phi',
+    'spiral_sharpness',
+    
+    # Vortex parameters
+    'h_vortex_amp', 'h_vortex_phi0', 'h_vortex_r0', 'h_vortex_width_phi',
+    'h_vortex_width_r', 'sig_vortex_amp', 'sig_vortex_phi0', 'sig_vortex_r0',
+    'sig_vortex_width_phi', 'sig_vortex_width_r', 'vortex_sharpness',
+    
+    # Fourier parameters
+    'h_fourier_aj', 'h_fourier_bj', 'sig_fourier_aj', 'sig_fourier_bj',
+    'h_modulation_strength', 'h_asymmetry_factor', 'sig_modulation_strength',
+    'sig_asymmetry_factor',
+    
+    # Radial damping
+    'use_radial_damping', 'azimuthal_r_max', 'azimuthal_r_width',
+    
+    # Warp
+    'enable_warp', 'warp_amplitude', 'warp_phase', 'warp_mode',
+    
+    # Inner edge shadow
+    'use_inner_edge_shadow', 'inner_edge_radius', 'inner_edge_width',
+    'inner_edge_height', 'inner_edge_azimuthal', 'inner_edge_phi',
+    'inner_edge_phi_width',
+    
+    # Vertical steepness
+    'vertical_steepness',
+)
+
+# Queue sentinel that stops the background writer
+_STOP = object()
+
+# Default logbook, resolved when the module is imported: batch workers
+# change into a private working directory before their runs are logged
+DEFAULT_LOGBOOK_PATH = os.path.abspath("../../Simulations/simulation_logbook.xlsx")
+
+# Meta columns written for every simulation, before the parameter columns
+META_COLUMNS = ('Timestamp', 'Name', 'Status', 'Runtime_min', 'Base_Directory', 'Directory', 'Error',
+                'ComboHash')
+
+# Schema shared by all part files. Parameter values are stored as text, so
+# parts with e.g. mdisk=0.01 and mdisk="0.01*ms" can be scanned together.
+LOGBOOK_SCHEMA = pa.schema(
+    [(col, pa.float64() if col == 'Runtime_min' else pa.string()) for col in META_COLUMNS]
+    + [(col, pa.string()) for col in PARAM_COLUMNS]
+)
+
+
+def _json_default(value):
+    """json.dumps fallback for numpy arrays and scalars"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def _to_text(value):
+    """
+    Text form of a parameter value as stored in the logbook
+    
+    Lists, tuples and arrays (wbound, mixabun, h_vortex_amp, ...) are stored
+    as JSON in a single pass; str() would summarize long arrays with "...".
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple, dict)) or (hasattr(value, 'ndim') and value.ndim > 0):
+        return json.dumps(value, default=_json_default)
+    return str(value)
+
+
+def _legacy_text(value):
+    """
+    Text form of a value read from a legacy Excel logbook
+    
+    pandas reads integer columns with gaps as floats; integral floats are
+    written as ints so they match the text add_simulation stores (2, not 2.0).
+    Lists were written with str() ("['astrosilicate']") and are converted
+    to the JSON form of _to_text.
+    """
+    if isinstance(value, str) and value.startswith(('[', '(')):
+        try:
+            return _to_text(ast.literal_eval(value))
+        except (ValueError, SyntaxError):
+            return value
+    if pd.isna(value):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _as_number(value):
+    """
+    Numeric value of a search criterion, or None if it is not a number
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _restore_numbers(df):
+    """
+    Convert parameter columns that only hold numbers back to numbers
+    (for the Excel/CSV exports)
+    """
+    df = df.copy()
+    for col in PARAM_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].mask(df[col] == '')
+        numbers = pd.to_numeric(values, errors='coerce')
+        if numbers.notna().sum() == values.notna().sum():
+            df[col] = numbers
+    return df
+
+
+def _write_xlsx(df, path):
+    """
+    Write a DataFrame to an Excel file with a write-only (streaming)
+    openpyxl workbook; rows are streamed out instead of being built
+    as a full in-memory sheet first
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    # NaN is written as an empty cell
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(path)
+
+
 class SimulationLogbook:
     """
     Central logbook for all simulations
     Appends data after each simulation run
+    
+    Used as a context manager, rows are handed to a background thread
+    that writes them within flush_interval seconds, so add_simulation
+    never waits for disk I/O:
+    
+        with SimulationLogbook() as logbook:
+            logbook.add_simulation(...)
     """
     
-    def __init__(self, logbook_path="../../Simulations/simulation_logbook.xlsx"):
+    # Directories already created by this process
+    _dirs_created = set()
+    
+    def __init__(self, logbook_path=DEFAULT_LOGBOOK_PATH, flush_interval=5):
         """
         Initialize logbook
         
@@ -28,15 +209,62 @@ class SimulationLogbook:
         -----------
         logbook_path : str
             Path to central logbook file
+        flush_interval : float
+            Background writer: write at the latest after this many seconds
         """
         self.logbook_path = logbook_path
-        self.lock_path = logbook_path + ".lock"
+        self.flush_interval = flush_interval
         
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(os.path.abspath(logbook_path)), exist_ok=True)
+        # Background writer (only inside a with-block)
+        self._queue = None
+        self._writer = None
+        self._writer_error = None
+        
+        # Logbook as last read from the part files
+        self._part_frames = {}
+        self._cached_df = None
+        
+        # Parquet part files, next to the Excel logbook
+        logbook_dir = os.path.dirname(os.path.abspath(logbook_path))
+        self.parts_dir = os.path.join(logbook_dir, "logbook_parts")
+        
+        # Ensure directories exist (once per process)
+        if self.parts_dir not in SimulationLogbook._dirs_created:
+            os.makedirs(self.parts_dir, exist_ok=True)
+            SimulationLogbook._dirs_created.add(self.parts_dir)
+        
+        # Logbooks written before the Parquet parts existed
+        self._import_legacy_logbook()
+    
+    def __enter__(self):
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._drain, daemon=True)
+        self._writer.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def close(self):
+        """
+        Write all queued rows and stop the background writer
+        """
+        if self._writer is None:
+            return
+        
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._writer = None
+        self._queue = None
+        
+        # Do not report a clean close if some rows could not be written
+        if self._writer_error is not None:
+            error, self._writer_error = self._writer_error, None
+            raise RuntimeError("Logbook writer failed, some rows were not written") from error
     
     def add_simulation(self, params, run_dir, name, timestamp, runtime_minutes, 
-                      status="SUCCESS", error_msg=None):
+                      status="SUCCESS", error_msg=None, combo_hash=None):
         """
         Add a simulation to the logbook
         
@@ -56,6 +284,8 @@ class SimulationLogbook:
             SUCCESS or FAILED
         error_msg : str, optional
             Error message if failed
+        combo_hash : str, optional
+            Batch combination hash, used to resume interrupted batches
         """
         
         # Prepare row data
@@ -68,155 +298,201 @@ class SimulationLogbook:
             'Base_Directory': os.path.basename(os.path.dirname(run_dir)),
             'Directory': run_dir,
             'Error': error_msg if error_msg else '',
-            
-            # Stellar parameters
-            'tstar': params.get('tstar', ''),
-            'rstar': params.get('rstar', ''),
-            'mstar': params.get('mstar', ''),
-            'istar_sphere': params.get('istar_sphere', ''),
-            'pc': params.get('pc', ''),
-            'incl': params.get('incl', ''),
-            
-            # Disk parameters
-            'mdisk': params.get('mdisk', ''),
-            'rin': params.get('rin', ''),
-            'rdisk': params.get('rdisk', ''),
-            'hrdisk': params.get('hrdisk', ''),
-            'plsig1': params.get('plsig1', ''),
-            'plh': params.get('plh', ''),
-            'hrpivot': params.get('hrpivot', ''),
-            'sigma_type': params.get('sigma_type', ''),
-            'sig0': params.get('sig0', ''),
-            
-            # Inner rim parameters
-            'hpr_prim_rout': params.get('hpr_prim_rout', ''),
-            'prim_rout': params.get('prim_rout', ''),
-            'srim_rout': params.get('srim_rout', ''),
-            'srim_plsig': params.get('srim_plsig', ''),
-            
-            # Dust parameters
-            'dustkappa': str(params.get('dustkappa', '')),
-            'gsmax': params.get('gsmax', ''),
-            'gsmin': params.get('gsmin', ''),
-            'mixabun': str(params.get('mixabun', '')),
-            
-            # Grid parameters
-            'wbound': str(params.get('wbound', '')),
-            'nw': str(params.get('nw', '')),
-            'xbound': str(params.get('xbound', '')),
-            'nx': str(params.get('nx', '')),
-            'ybound': str(params.get('ybound', '')),
-            'ny': str(params.get('ny', '')),
-            'zbound': str(params.get('zbound', '')),
-            'nz': str(params.get('nz', '')),
-            
-            # Computational parameters
-            'nphot': params.get('nphot', ''),
-            'nphot_scat': params.get('nphot_scat', ''),
-            'nphot_spec': params.get('nphot_spec', ''),
-            'threads': params.get('threads', ''),
-            'modified_random_walk': params.get('modified_random_walk', ''),
-            'scattering_mode_max': params.get('scattering_mode_max', ''),
-            'mc_scat_maxtauabs': params.get('mc_scat_maxtauabs', ''),
-            
-            # Image parameters
-            'npix': params.get('npix', ''),
-            'phi': params.get('phi', ''),
-            'sizeau': params.get('sizeau', ''),
-            'nostar': params.get('nostar', ''),
-            
-            # Spiral parameters
-            'h_spiral_amp': params.get('h_spiral_amp', ''),
-            'sig_spiral_amp': params.get('sig_spiral_amp', ''),
-            'spiral_pitch': params.get('spiral_pitch', ''),
-            'n_arms': params.get('n_arms', ''),
-            'spiral_width_phi': params.get('spiral_width_phi', ''),
-            'spiral_sharpness': params.get('spiral_sharpness', ''),
-            
-            # Vortex parameters
-            'h_vortex_amp': str(params.get('h_vortex_amp', '')),
-            'h_vortex_phi0': str(params.get('h_vortex_phi0', '')),
-            'h_vortex_r0': str(params.get('h_vortex_r0', '')),
-            'h_vortex_width_phi': str(params.get('h_vortex_width_phi', '')),
-            'h_vortex_width_r': str(params.get('h_vortex_width_r', '')),
-            'sig_vortex_amp': str(params.get('sig_vortex_amp', '')),
-            'sig_vortex_phi0': str(params.get('sig_vortex_phi0', '')),
-            'sig_vortex_r0': str(params.get('sig_vortex_r0', '')),
-            'sig_vortex_width_phi': str(params.get('sig_vortex_width_phi', '')),
-            'sig_vortex_width_r': str(params.get('sig_vortex_width_r', '')),
-            'vortex_sharpness': params.get('vortex_sharpness', ''),
-            
-            # Fourier parameters
-            'h_fourier_aj': str(params.get('h_fourier_aj', '')),
-            'h_fourier_bj': str(params.get('h_fourier_bj', '')),
-            'sig_fourier_aj': str(params.get('sig_fourier_aj', '')),
-            'sig_fourier_bj': str(params.get('sig_fourier_bj', '')),
-            'h_modulation_strength': params.get('h_modulation_strength', ''),
-            'h_asymmetry_factor': params.get('h_asymmetry_factor', ''),
-            'sig_modulation_strength': params.get('sig_modulation_strength', ''),
-            'sig_asymmetry_factor': params.get('sig_asymmetry_factor', ''),
-            
-            # Radial damping
-            'use_radial_damping': params.get('use_radial_damping', ''),
-            'azimuthal_r_max': params.get('azimuthal_r_max', ''),
-            'azimuthal_r_width': params.get('azimuthal_r_width', ''),
-            
-            # Warp
-            'enable_warp': params.get('enable_warp', ''),
-            'warp_amplitude': params.get('warp_amplitude', ''),
-            'warp_phase': params.get('warp_phase', ''),
-            'warp_mode': params.get('warp_mode', ''),
-            
-            # Inner edge shadow
-            'use_inner_edge_shadow': params.get('use_inner_edge_shadow', ''),
-            'inner_edge_radius': params.get('inner_edge_radius', ''),
-            'inner_edge_width': params.get('inner_edge_width', ''),
-            'inner_edge_height': params.get('inner_edge_height', ''),
-            'inner_edge_azimuthal': params.get('inner_edge_azimuthal', ''),
-            'inner_edge_phi': params.get('inner_edge_phi', ''),
-            'inner_edge_phi_width': params.get('inner_edge_phi_width', ''),
-            
-            # Vertical steepness
-            'vertical_steepness': params.get('vertical_steepness', ''),
+            'ComboHash': combo_hash if combo_hash else '',
         }
         
-        # Convert to DataFrame row
-        new_row = pd.DataFrame([row_data])
+        # Parameter columns
+        for key in PARAM_COLUMNS:
+            row_data[key] = _to_text(params.get(key))
+        
+        # Outside a with-block every row is written immediately
+        if self._writer is not None:
+            self._queue.put(row_data)
+        else:
+            self._write_rows([row_data])
+    
+    def _drain(self):
+        """
+        Background writer: collect queued rows and write them together
+        """
+        stop = False
+        while not stop:
+            # Wait for the first row, then collect more until flush_interval
+            # has passed (rows arriving together share one part file)
+            rows = [self._queue.get()]
+            deadline = time.time() + self.flush_interval
+            while rows[-1] is not _STOP:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            if rows[-1] is _STOP:
+                rows.pop()
+                stop = True
+            
+            # Keep the writer alive for later rows; close() reports the failure
+            try:
+                self._write_rows(rows)
+            except Exception as e:
+                print(f"Error writing to logbook: {e}")
+                if self._writer_error is None:
+                    self._writer_error = e
+    
+    def _write_rows(self, rows):
+        """
+        Write rows as one part file
+        """
+        if not rows:
+            return
         
-        # Use file lock to prevent concurrent writes (for batch runs)
-        lock = FileLock(self.lock_path, timeout=10)
+        # Append-only: every chunk gets its own part file, no read-modify-write.
+        # The pid keeps file names unique across concurrent writers, so no lock is needed.
+        # Names start with the write time (zero-padded ns), so sorted part files
+        # are in append order; run timestamps are not (a batch's rows carry the
+        # batch start time).
+        first = rows[0]
+        part_path = os.path.join(self.parts_dir,
+                                 f"{time.time_ns():020d}_{first['Timestamp']}_{first['Name']}_{os.getpid()}.parquet")
+        tmp_path = part_path + ".tmp"
         
         try:
-            with lock:
-                # Load existing data or create new
-                if os.path.exists(self.logbook_path):
-                    try:
-                        existing_df = pd.read_excel(self.logbook_path, engine='openpyxl')
-                        # Append new row
-                        updated_df = pd.concat([existing_df, new_row], ignore_index=True)
-                    except Exception as e:
-                        print(f"Warning: Could not read existing logbook, creating new one. Error: {e}")
-                        updated_df = new_row
-                else:
-                    updated_df = new_row
-                
-                # Save to Excel
-                updated_df.to_excel(self.logbook_path, index=False, engine='openpyxl')
-                
-                # Also save as CSV backup
-                csv_path = self.logbook_path.replace('.xlsx', '.csv')
-                updated_df.to_csv(csv_path, index=False)
+            # Rows go straight to Arrow, no DataFrame in between.
+            # Written under a temporary name so readers never see half a file.
+            pq.write_table(pa.Table.from_pylist(rows, schema=LOGBOOK_SCHEMA), tmp_path)
+            os.replace(tmp_path, part_path)
                 
         except Exception as e:
             print(f"Error writing to logbook: {e}")
             print("Attempting to save to backup location...")
             
-            # Backup: save to run directory
-            backup_path = os.path.join(run_dir, f"logbook_backup_{timestamp}.xlsx")
-            new_row.to_excel(backup_path, index=False, engine='openpyxl')
-            print(f"Saved backup to: {backup_path}")
+            # Backup: save each row to its run directory
+            for row in rows:
+                backup_path = os.path.join(row['Directory'], f"logbook_backup_{row['Timestamp']}.xlsx")
+                pd.DataFrame([row]).to_excel(backup_path, index=False, engine='openpyxl')
+                print(f"Saved backup to: {backup_path}")
+    
+    def _import_legacy_logbook(self):
+        """
+        Convert an existing Excel logbook into a part file (once)
+        """
+        if glob.glob(os.path.join(self.parts_dir, "*.parquet")):
+            return
+        if not os.path.exists(self.logbook_path):
+            return
+        
+        try:
+            df = pd.read_excel(self.logbook_path, engine='openpyxl')
+        except Exception as e:
+            print(f"Warning: Could not read existing logbook. Error: {e}")
+            return
+        
+        # Same column types as the parts written by add_simulation
+        for col in df.columns:
+            if col != 'Runtime_min':
+                df[col] = df[col].map(_legacy_text)
+        part_path = os.path.join(self.parts_dir, "00000000_legacy.parquet")
+        tmp_path = f"{part_path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+    
+    def _read_parts(self):
+        """
+        Read all part files into one DataFrame (None if there are none)
+        
+        The result is cached; it is only rebuilt when the set of part files
+        changed, and then only new part files are read from disk.
+        """
+        part_files = self._part_files()
+        if part_files == list(self._part_frames):
+            return self._cached_df
+        
+        self._part_frames = {
+            p: self._part_frames[p] if p in self._part_frames else pd.read_parquet(p)
+            for p in part_files
+        }
+        
+        if part_files:
+            self._cached_df = pd.concat(list(self._part_frames.values()), ignore_index=True)
+        else:
+            self._cached_df = None
+        
+        return self._cached_df
+    
+    def _part_files(self):
+        """Paths of all part files, in the order they were written"""
+        return sorted(glob.glob(os.path.join(self.parts_dir, "*.parquet")))
+    
+    def _dataset(self):
+        """
+        Lazy Arrow dataset over all part files (None if there are none)
+        Only the columns and rows that are asked for get decoded.
+        """
+        part_files = self._part_files()
+        if not part_files:
+            return None
+        return ds.dataset(part_files, format='parquet', schema=LOGBOOK_SCHEMA)
+    
+    def _read_columns(self, columns=None):
+        """
+        Read selected columns of all simulations (None if there are none)
+        """
+        dataset = self._dataset()
+        if dataset is None:
+            return None
+        return dataset.to_table(columns=columns).to_pandas()
+    
+    def _read_tail(self, last_n, columns=None):
+        """
+        Read selected columns of the last N simulations (None if there are none)
+        
+        Part file names start with their write time, so the most recently
+        logged rows are in the last files; only those are opened (row counts
+        come from the Parquet footers).
+        """
+        part_files = self._part_files()
+        if not part_files:
+            return None
+        
+        tail_files = []
+        n_rows = 0
+        for part_file in reversed(part_files):
+            tail_files.append(part_file)
+            n_rows += pq.read_metadata(part_file).num_rows
+            if n_rows >= last_n:
+                break
+        tail_files.reverse()
+        
+        dataset = ds.dataset(tail_files, format='parquet', schema=LOGBOOK_SCHEMA)
+        return dataset.to_table(columns=columns).to_pandas().tail(last_n)
+    
+    def compile(self):
+        """
+        Compile all part files into the Excel logbook
+        (use export_to_csv for a CSV copy)
+        
+        Returns:
+        --------
+        DataFrame with all simulations (None if the logbook is empty)
+        """
+        df = self._read_parts()
+        if df is None:
+            return None
+        
+        df = _restore_numbers(df)
+        
+        # Write to a temporary file and swap it in atomically, so readers
+        # never see a half-written logbook and concurrent compiles need no lock
+        tmp_path = f"{self.logbook_path}.{os.getpid()}.tmp"
+        _write_xlsx(df, tmp_path)
+        os.replace(tmp_path, self.logbook_path)
+        
+        return df
     
-    def get_summary(self, last_n=10):
+    def get_summary(self, last_n=10, columns=None):
         """
         Get summary of last N simulations
         
@@ -224,42 +500,75 @@ class SimulationLogbook:
         -----------
         last_n : int
             Number of recent simulations to show
+        columns : list of str, optional
+            Only read these columns (default: all)
         
         Returns:
         --------
         DataFrame with last N simulations
         """
-        if not os.path.exists(self.logbook_path):
+        df = self._read_tail(last_n, columns)
+        if df is None:
             print("No logbook found yet.")
             return None
         
-        df = pd.read_excel(self.logbook_path, engine='openpyxl')
-        return df.tail(last_n)
+        return df
     
-    def search(self, **criteria):
+    def search(self, columns=None, **criteria):
         """
         Search logbook for specific parameters
         
         Example:
             logbook.search(mdisk="0.01*ms", n_arms=2)
         
+        Parameters:
+        -----------
+        columns : list of str, optional
+            Only return these columns (default: all)
+        **criteria
+            Column name -> value, unknown columns are ignored
+        
         Returns:
         --------
         DataFrame with matching simulations
         """
-        if not os.path.exists(self.logbook_path):
+        dataset = self._dataset()
+        if dataset is None:
             print("No logbook found yet.")
             return None
         
-        df = pd.read_excel(self.logbook_path, engine='openpyxl')
-        
-        # Filter by criteria
-        mask = pd.Series([True] * len(df))
+        # Filter by criteria. Text criteria are evaluated by Arrow while
+        # scanning the parts; numbers are compared numerically afterwards,
+        # so alpha=2.0 matches a stored "2" (and n_arms=2 a legacy "2.0")
+        conditions = []
+        numeric = {}
         for key, value in criteria.items():
-            if key in df.columns:
-                mask &= (df[key] == value)
+            if key not in LOGBOOK_SCHEMA.names:
+                continue
+            if key == 'Runtime_min':
+                conditions.append(ds.field(key) == value)
+                continue
+            number = _as_number(value)
+            if number is not None:
+                numeric[key] = number
+            else:
+                conditions.append(ds.field(key) == _to_text(value))
+        
+        read_columns = columns
+        if columns is not None:
+            read_columns = list(columns) + [key for key in numeric if key not in columns]
         
-        return df[mask]
+        expr = functools.reduce(operator.and_, conditions) if conditions else None
+        df = dataset.to_table(columns=read_columns, filter=expr).to_pandas()
+        
+        if numeric:
+            mask = pd.Series(True, index=df.index)
+            for key, number in numeric.items():
+                mask &= pd.to_numeric(df[key], errors='coerce') == number
+            df = df[mask].reset_index(drop=True)
+            if columns is not None:
+                df = df[list(columns)]
+        return df
     
     def export_to_csv(self, output_path=None):
         """
@@ -268,17 +577,17 @@ class SimulationLogbook:
         if output_path is None:
             output_path = self.logbook_path.replace('.xlsx', '.csv')
         
-        if not os.path.exists(self.logbook_path):
+        df = self._read_parts()
+        if df is None:
             print("No logbook found yet.")
             return
         
-        df = pd.read_excel(self.logbook_path, engine='openpyxl')
-        df.to_csv(output_path, index=False)
+        _restore_numbers(df).to_csv(output_path, index=False)
         print(f"Exported to: {output_path}")
         return output_path
 
 
-def view_logbook(logbook_path="../../Simulations/simulation_logbook.xlsx", last_n=20):
+def view_logbook(logbook_path=DEFAULT_LOGBOOK_PATH, last_n=20):
     """
     Quick function to view the logbook
     
@@ -289,12 +598,17 @@ def view_logbook(logbook_path="../../Simulations/simulation_logbook.xlsx", last_
     last_n : int
         Number of recent simulations to show
     """
-    if not os.path.exists(logbook_path):
+    # Key columns shown for the recent simulations
+    display_cols = ['Timestamp', 'Name', 'Status', 'Runtime_min', 'mdisk', 'hrdisk', 
+                   'h_spiral_amp', 'sig_spiral_amp', 'n_arms']
+    
+    # Statistics need two columns of every simulation, the table only the last rows
+    logbook = SimulationLogbook(logbook_path)
+    df = logbook._read_columns(['Status', 'Runtime_min'])
+    if df is None:
         print("No logbook found yet. Run some simulations first!")
         return
     
-    df = pd.read_excel(logbook_path, engine='openpyxl')
-    
     print("\n" + "="*80)
     print(f"SIMULATION LOGBOOK ({len(df)} total simulations)")
     print("="*80)
@@ -311,32 +625,30 @@ def view_logbook(logbook_path="../../Simulations/simulation_logbook.xlsx", last_
     print(f"Last {last_n} simulations:")
     print("-"*80)
     
-    recent = df.tail(last_n)
+    recent = logbook._read_tail(last_n, display_cols)
     
-    # Show key columns
-    display_cols = ['Timestamp', 'Name', 'Status', 'Runtime_min', 'mdisk', 'hrdisk', 
-                   'h_spiral_amp', 'sig_spiral_amp', 'n_arms']
-    display_cols = [col for col in display_cols if col in recent.columns]
-    
-    print(recent[display_cols].to_string(index=False))
+    print(recent.to_string(index=False))
     print("="*80 + "\n")
 
 
 # Convenience function for scripts
 def log_simulation(params, run_dir, name, timestamp, runtime_minutes, 
                   status="SUCCESS", error_msg=None,
-                  logbook_path="../../Simulations/simulation_logbook.xlsx"):
+                  logbook_path=DEFAULT_LOGBOOK_PATH, combo_hash=None):
     """
     Convenience function to log a simulation
     
-    Usage in single_run.py or batch_run.py:
+    Usage (main.py logs single runs this way):
         from export import log_simulation
         log_simulation(params, run_dir, name, timestamp, runtime)
+    
+    combo_hash is the batch combination hash (see batch_run.combo_hash),
+    only given for runs that completed, so resume can skip them.
     """
     logbook = SimulationLogbook(logbook_path)
     logbook.add_simulation(params, run_dir, name, timestamp, runtime_minutes, 
-                          status, error_msg)
-    print(f"✓ Logged to: {logbook_path}")
+                          status, error_msg, combo_hash=combo_hash)
+    print(f"✓ Logged to: {logbook.parts_dir}")
 
 
 if __name__ == "__main__":
@@ -344,4 +656,7 @@ if __name__ == "__main__":
     print("Simulation Logbook Module")
     print("\nTo view logbook, run:")
     print("  from export import view_logbook")
-    print("  view_logbook()")
\ No newline at end of file
+    print("  view_logbook()")
+    print("\nTo rebuild the Excel logbook from the part files, run:")
+    print("  from export import SimulationLogbook")
+    print("  SimulationLogbook().compile()")
\ No newline at end of file
@@ -5,15 +5,65 @@ Handles user input and coordinates single or batch runs
 
 import os
 import sys
+import json
+import queue
+import argparse
 import datetime
 import logging
+import logging.handlers
 import time
 import shutil
 from single_run import run_single_simulation
-from plots import create_all_plots
+from config_loader import get_params_dict_from_config
+from export import SimulationLogbook, log_simulation
 from terminal_ui import print_banner, print_success, print_error, print_system_info, print_parameter_table
 
 
+def _default_config():
+    # Option 1: config.py
+    return None
+
+
+def _reference_config():
+    # Option 2: pick one of the reference configs
+    from config_loader import REFERENCE_CONFIGS
+    
+    ### MAKE SURE YOU ADD YOUR CONFIGS IN CONFIG_LOADER.PY ###
+    
+    print("\nAvailable reference configurations:")
+    for i, key in enumerate(REFERENCE_CONFIGS.keys(), start=1):
+        print(f"  {i} - {key}")
+    
+    ref_choice = input("\nEnter configuration number: ").strip()
+    
+    try:
+        ref_idx = int(ref_choice) - 1
+        if 0 <= ref_idx < len(REFERENCE_CONFIGS):
+            return list(REFERENCE_CONFIGS.keys())[ref_idx]
+        else:
+            print("Invalid number. Please concentrate and start the simulation again.")
+            sys.exit(1)
+    except ValueError:
+        print("Please enter a valid number. Please concentrate and start the simulation again.")
+        sys.exit(1)
+
+
+def _custom_config():
+    # Option 3: path to a custom config file
+    custom_path = input("Enter path to custom config file: ").strip()
+    if os.path.exists(custom_path):
+        return custom_path
+    print(f"File not found: {custom_path}. Please check the path and start again.")
+    sys.exit(1)
+
+
+# Answers of the interactive prompts
+_CONFIG_CHOICES = {"1": _default_config, "2": _reference_config, "3": _custom_config}
+_MODE_CHOICES = {"1": "single", "2": "batch"}
+_UI_CHOICES = {"1": "advanced", "2": "raw"}
+_REFERENCE_SEDS = {"1": "ABAur_Dominik.txt", "2": "ABAur_Dullemond.txt", "3": None}
+
+
 def get_user_inputs():
     ### Get user inputs for simulation configuration ###
     
@@ -33,39 +83,8 @@ def get_user_inputs():
     print("3 - Custom config file")
     config_choice = input("Please choose 1, 2, or 3: ").strip()
     
-    config_name = None
-    if config_choice == "1":
-        config_name = None
-    if config_choice == "2":
-        # List available reference configs
-        from config_loader import REFERENCE_CONFIGS
-        
-        ### MAKE SURE YOU ADD YOUR CONFIGS IN CONFIG_LOADER.PY ###
-        
-        print("\nAvailable reference configurations:")
-        for i, key in enumerate(REFERENCE_CONFIGS.keys(), start=1):
-            print(f"  {i} - {key}")
-        
-        ref_choice = input("\nEnter configuration number: ").strip()
-        
-        try:
-            ref_idx = int(ref_choice) - 1
-            if 0 <= ref_idx < len(REFERENCE_CONFIGS):
-                config_name = list(REFERENCE_CONFIGS.keys())[ref_idx]
-            else:
-                print("Invalid number. Please concentrate and start the simulation again.")
-                sys.exit(1)
-        except ValueError:
-            print("Please enter a valid number. Please concentrate and start the simulation again.")
-            sys.exit(1)
-    
-    elif config_choice == "3":
-        custom_path = input("Enter path to custom config file: ").strip()
-        if os.path.exists(custom_path):
-            config_name = custom_path
-        else:
-            print(f"File not found: {custom_path}. Please check the path and start again.")
-            sys.exit(1)
+    # Anything else falls back to the default config
+    config_name = _CONFIG_CHOICES.get(config_choice, _default_config)()
 
     ########################
     ### Ask for run mode ###
@@ -76,11 +95,8 @@ def get_user_inputs():
     print("2 - Batch run")
     mode_choice = input("Please choose 1 or 2: ").strip()
     
-    if mode_choice == "1":
-        run_mode = "single"
-    elif mode_choice == "2":
-        run_mode = "batch"
-    else:
+    run_mode = _MODE_CHOICES.get(mode_choice)
+    if run_mode is None:
         print("Invalid choice. Exiting.")
         sys.exit(1)
 
@@ -95,10 +111,7 @@ def get_user_inputs():
     print("2 - Raw Output (Standard RADMC-3D terminal output)")
     ui_choice = input("Please choose 1 or 2: ").strip()
     
-    if ui_choice == "1":
-        ui_mode = "advanced"
-    else:
-        ui_mode = "raw" 
+    ui_mode = _UI_CHOICES.get(ui_choice, "raw")
 
     ###################################
     ### Ask about image computation ###
@@ -128,12 +141,16 @@ def get_user_inputs():
     print("3 - None")
     
     choice = input("Please choose 1, 2 or 3: ").strip()
-    if choice == "1":
-        reference_sed = "ABAur_Dominik.txt"
-    elif choice == "2":
-        reference_sed = "ABAur_Dullemond.txt"
-    else:
-        reference_sed = None
+    reference_sed = _REFERENCE_SEDS.get(choice)
+    
+    ##################################
+    ### Ask about resuming a batch ###
+    ##################################
+    
+    resume = False
+    if run_mode == 'batch':
+        input_resume = input("\nSkip combinations already completed (see logbook)? (y/n): ").strip().lower()
+        resume = input_resume == 'y'
 
     # Returning choices    
     return {
@@ -143,46 +160,107 @@ def get_user_inputs():
         'wavelength': wavelength,
         'reference_sed': reference_sed,
         'run_mode': run_mode,
-        'ui_mode': ui_mode
+        'ui_mode': ui_mode,
+        'resume': resume
     }
 
+
+def parse_args(argv):
+    ### Non-interactive alternative to get_user_inputs (for scripts and CI) ###
+    # Returns a list of user_inputs dicts, one per run
+    parser = argparse.ArgumentParser(description="RADMC-3D Simulation Suite")
+    parser.add_argument('--spec', help="JSON file with a list of runs (user_inputs dicts)")
+    parser.add_argument('--name', help="Name for this run")
+    parser.add_argument('--config', dest='config_name', default=None,
+                        help="Reference config name or custom config file (default: config.py)")
+    parser.add_argument('--mode', dest='run_mode', choices=['single', 'batch'], default='single')
+    parser.add_argument('--ui', dest='ui_mode', choices=['advanced', 'raw'], default='raw')
+    parser.add_argument('--make-images', action='store_true', help="Compute images")
+    parser.add_argument('--wavelength', type=float, default=2.2, help="Image wavelength in micron")
+    parser.add_argument('--reference-sed', default=None, help="Reference SED file")
+    parser.add_argument('--resume', action='store_true', default=None,
+                        help="Batch mode: skip combinations already completed (see logbook)")
+    args = parser.parse_args(argv)
+    
+    defaults = {key: value for key, value in vars(args).items() if key != 'spec'}
+    
+    if args.spec:
+        with open(args.spec) as f:
+            runs = json.load(f)
+        # Entries of the spec override the command line values
+        runs = [{**defaults, **run} for run in runs]
+    else:
+        runs = [defaults]
+    
+    for run in runs:
+        if not run.get('name'):
+            parser.error("every run needs a name (--name or 'name' in the spec)")
+    
+    return runs
+
+
 #######################
 ### Import PY FILES ###
 #######################
 
+# Base directories already created by this process
+_created_base_dirs = set()
+
+
 def setup_run_directory(name, timestamp, base_dir="../../Simulations/Batch"):
     # Create the run-directory
-    os.makedirs(base_dir, exist_ok=True)
+    # (the base directory only on first use, then a single mkdir per run)
+    if base_dir not in _created_base_dirs:
+        os.makedirs(base_dir, exist_ok=True)
+        _created_base_dirs.add(base_dir)
     run_dir = os.path.join(base_dir, f"run_{timestamp}_{name}")
-    os.makedirs(run_dir, exist_ok=True)
+    try:
+        os.mkdir(run_dir)
+    except FileExistsError:
+        pass
     return run_dir
 
 
 def setup_logging(run_dir, name, timestamp):
-    # Setup the logging
+    # Setup the logging: attach a log file for this run to the root logger
+    # Returns the handler, detach it with close_logging() when the run is done
+    # (basicConfig only works once per process, later runs would keep
+    # logging into the first run's file)
     log_file = os.path.join(run_dir, f"log_{timestamp}_{name}.txt")
-    logging.basicConfig(
-        filename=log_file,
-        level=logging.INFO,
-        format='%(asctime)s %(levelname)s:%(message)s'
-    )
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s:%(message)s'))
+    
+    # logging calls only enqueue, a listener thread formats and writes
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.listener = logging.handlers.QueueListener(log_queue, file_handler)
+    handler.listener.start()
+    
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(handler)
+    return handler
+
+
+def close_logging(handler):
+    # Detach a handler from setup_logging and write out all pending records
+    logging.getLogger().removeHandler(handler)
+    handler.listener.stop()
+    for target in handler.listener.handlers:
+        target.close()
+    handler.close()
 
 
 def get_params_dict(config_module):
     # Extract parameters from config module
     # Returns only parameter values (filters module objects to prevent errors)
-    params = {}
-    for key in dir(config_module):
-        if not key.startswith('__'):
-            value = getattr(config_module, key)
-            # Skip module imports
-            if not str(type(value)).startswith("<class 'module'>"):
-                params[key] = value
-    return params
+    return get_params_dict_from_config(config_module)
 
 
-def run_single_mode(user_inputs, timestamp):
+def run_single_mode(user_inputs, timestamp, verbose=True):
     # Execute a single simulation run for 1 model
+    # verbose=False skips banner, system info and parameter table
+    # (when running many models, print_system_info is called once by the caller)
     # Read the corresponding user inputs
     name = user_inputs['name']
     config_name = user_inputs['config_name']
@@ -207,66 +285,83 @@ def run_single_mode(user_inputs, timestamp):
     from naming import generate_run_directory, determine_category
     # Define the naming structure for run-folders
     base_dir = "../../Simulations/Batch"
-    run_dir, full_run_name = generate_run_directory(base_dir, name, params, timestamp)
     category = determine_category(params)
+    run_dir, full_run_name = generate_run_directory(base_dir, name, params, timestamp, category)
     
-    print_banner("single", name, category, timestamp) # Output the banner defined in terminal_ui.py
-    print_system_info() # Print available system resources
-    print_parameter_table(params, show_all=False) # Print most important configuration parameters
+    if verbose:
+        print_banner("single", name, category, timestamp) # Output the banner defined in terminal_ui.py
+        print_system_info() # Print available system resources
+        print_parameter_table(params, show_all=False) # Print most important configuration parameters
     
     os.makedirs(run_dir, exist_ok=True)
-    setup_logging(run_dir, full_run_name, timestamp)
-    
-    logging.info(f"Starting single run: {full_run_name}")
-    logging.info(f"Configuration: {config_name if config_name else 'default'}")
-    logging.info(f"UI Mode: {ui_mode}")
+    # Log records are written by a listener thread, so logging from the
+    # simulation (including its output reader) never waits on file I/O
+    log_handler = setup_logging(run_dir, full_run_name, timestamp)
     
     start_time = time.time()
     
-    spec, star, grid = run_single_simulation(
-        params=params,
-        run_dir=run_dir,
-        name=full_run_name,
-        timestamp=timestamp,
-        make_images=make_images,
-        wavelength=wavelength,
-        threads=params['threads'],
-        ui_mode=ui_mode
-    )
-    
-    # Create plots
-    create_all_plots(
-        run_dir=run_dir,
-        name=full_run_name,
-        timestamp=timestamp,
-        pc=params['pc'],
-        wav=wavelength,
-        reference_file=reference_sed
-    )
-    
-    # Save scripts
-    if os.path.exists("main.py"):
-        shutil.copy("main.py", os.path.join(run_dir, f"main_{full_run_name}_{timestamp}.py"))
-    
-    # Save config file (works for both default and reference configs)
-    if config_name:
-        # Reference or custom config
-        from config_loader import REFERENCE_CONFIGS
-        if config_name in REFERENCE_CONFIGS:
-            config_path = os.path.join('configs', REFERENCE_CONFIGS[config_name])
+    try:
+        logging.info(f"Starting single run: {full_run_name}")
+        logging.info(f"Configuration: {config_name if config_name else 'default'}")
+        logging.info(f"UI Mode: {ui_mode}")
+        
+        spec, star, grid = run_single_simulation(
+            params=params,
+            run_dir=run_dir,
+            name=full_run_name,
+            timestamp=timestamp,
+            make_images=make_images,
+            wavelength=wavelength,
+            threads=params['threads'],
+            ui_mode=ui_mode
+        )
+        
+        # Create plots (matplotlib is only imported when a run actually plots)
+        from plots import create_all_plots
+        create_all_plots(
+            run_dir=run_dir,
+            name=full_run_name,
+            timestamp=timestamp,
+            pc=params['pc'],
+            wav=wavelength,
+            reference_file=reference_sed
+        )
+        
+        # Save scripts
+        if os.path.exists("main.py"):
+            shutil.copy("main.py", os.path.join(run_dir, f"main_{full_run_name}_{timestamp}.py"))
+        
+        # Save config file (works for both default and reference configs)
+        if config_name:
+            # Reference or custom config
+            from config_loader import REFERENCE_CONFIGS
+            if config_name in REFERENCE_CONFIGS:
+                config_path = os.path.join('configs', REFERENCE_CONFIGS[config_name])
+            else:
+                config_path = config_name
         else:
-            config_path = config_name
-    else:
-        # Default config
-        config_path = "config.py"
-    
-    if os.path.exists(config_path):
-        shutil.copy(config_path, os.path.join(run_dir, f"config_{full_run_name}_{timestamp}.py"))
-    
-    end_time = time.time()
-    runtime = (end_time - start_time) / 60
+            # Default config
+            config_path = "config.py"
+        
+        if os.path.exists(config_path):
+            shutil.copy(config_path, os.path.join(run_dir, f"config_{full_run_name}_{timestamp}.py"))
+        
+        end_time = time.time()
+        runtime = (end_time - start_time) / 60
+        
+        logging.info(f"Runtime: {runtime:.2f} minutes")
+    except Exception as e:
+        runtime = (time.time() - start_time) / 60
+        log_simulation(params, run_dir, full_run_name, timestamp, runtime,
+                       status="FAILED", error_msg=str(e))
+        SimulationLogbook().compile()
+        raise
+    finally:
+        close_logging(log_handler)
     
-    logging.info(f"Runtime: {runtime:.2f} minutes")
+    # Central logbook: add this run, then rebuild the Excel file users open
+    log_simulation(params, run_dir, full_run_name, timestamp, runtime)
+    SimulationLogbook().compile()
     
     print("\n")
     print_success(f"Simulation completed successfully in {runtime:.1f} minutes!")
@@ -279,16 +374,29 @@ def main():
     print("RADMC-3D Simulation Suite")
     print("="*60 + "\n")
     
-    user_inputs = get_user_inputs()
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    if user_inputs['run_mode'] == 'single':
-        run_single_mode(user_inputs, timestamp)
-    elif user_inputs['run_mode'] == 'batch':
-        from batch_run import run_batch_mode
-        run_batch_mode(user_inputs, timestamp)
+    # Command line arguments skip the interactive questions
+    if len(sys.argv) > 1:
+        runs = parse_args(sys.argv[1:])
     else:
-        sys.exit(1)
+        runs = [get_user_inputs()]
+    
+    # System info only once when running several models
+    verbose = len(runs) == 1
+    if not verbose:
+        print_system_info()
+    
+    # Runs share the working directory RADMC-3D writes into, so they
+    # run one after the other
+    for user_inputs in runs:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        if user_inputs['run_mode'] == 'single':
+            run_single_mode(user_inputs, timestamp, verbose=verbose)
+        elif user_inputs['run_mode'] == 'batch':
+            from batch_run import run_batch_mode
+            run_batch_mode(user_inputs, timestamp)
+        else:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
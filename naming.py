@@ -3,6 +3,7 @@ Module for automatic naming and categorization of simulations
 """
 
 import os
+import itertools
 
 
 def determine_category(params):
@@ -34,7 +35,7 @@ def determine_category(params):
     vortex_h = params.get('h_vortex_amp', [0.0, 0.0])
     vortex_sig = params.get('sig_vortex_amp', [0.0, 0.0])
     if isinstance(vortex_h, (list, tuple)):
-        has_vortex = any(v > 0 for v in vortex_h) or any(v > 0 for v in vortex_sig)
+        has_vortex = max(itertools.chain(vortex_h, vortex_sig), default=0) > 0
     else:
         has_vortex = vortex_h > 0 or vortex_sig > 0
     
@@ -42,15 +43,11 @@ def determine_category(params):
         active_features.append('vortex')
     
     # Check for Fourier modulation
-    fourier_h_a = params.get('h_fourier_aj', [0.0] * 5)
-    fourier_h_b = params.get('h_fourier_bj', [0.0] * 5)
-    fourier_sig_a = params.get('sig_fourier_aj', [0.0] * 5)
-    fourier_sig_b = params.get('sig_fourier_bj', [0.0] * 5)
-    
-    has_fourier = (any(v != 0 for v in fourier_h_a) or 
-                   any(v != 0 for v in fourier_h_b) or
-                   any(v != 0 for v in fourier_sig_a) or
-                   any(v != 0 for v in fourier_sig_b))
+    # One pass over all four coefficient lists (any nonzero value counts)
+    has_fourier = any(itertools.chain.from_iterable(
+        params.get(key, ()) for key in
+        ('h_fourier_aj', 'h_fourier_bj', 'sig_fourier_aj', 'sig_fourier_bj')
+    ))
     
     if has_fourier:
         active_features.append('fourier')
@@ -77,7 +74,7 @@ def determine_category(params):
         return 'combined_' + '_'.join(active_features)
 
 
-def generate_run_name(base_name, params, timestamp):
+def generate_run_name(base_name, params, timestamp, category=None):
     """
     Generate full run name with category prefix
     
@@ -89,6 +86,8 @@ def generate_run_name(base_name, params, timestamp):
         Simulation parameters
     timestamp : str
         Timestamp string
+    category : str, optional
+        Category if already known (default: determined from params)
         
     Returns:
     --------
@@ -96,7 +95,8 @@ def generate_run_name(base_name, params, timestamp):
         Full run name with category prefix
     """
     
-    category = determine_category(params)
+    if category is None:
+        category = determine_category(params)
     
     # Format: category_run_timestamp_basename
     full_name = f"{category}_run_{timestamp}_{base_name}"
@@ -104,7 +104,7 @@ def generate_run_name(base_name, params, timestamp):
     return full_name
 
 
-def generate_run_directory(base_dir, base_name, params, timestamp):
+def generate_run_directory(base_dir, base_name, params, timestamp, category=None):
     """
     Generate full run directory path with category prefix
     
@@ -118,6 +118,8 @@ def generate_run_directory(base_dir, base_name, params, timestamp):
         Simulation parameters
     timestamp : str
         Timestamp string
+    category : str, optional
+        Category if already known (default: determined from params)
         
     Returns:
     --------
@@ -127,7 +129,7 @@ def generate_run_directory(base_dir, base_name, params, timestamp):
         Full run name (without path)
     """
     
-    run_name = generate_run_name(base_name, params, timestamp)
+    run_name = generate_run_name(base_name, params, timestamp, category)
     run_dir = os.path.join(base_dir, run_name)
     
     return run_dir, run_name
\ No newline at end of file
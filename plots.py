@@ -3,13 +3,92 @@ Module for creating plots from RADMC-3D simulation results
 """
 
 import os
-import shutil
+import functools
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Plots are only saved to file, no GUI backend needed
 import matplotlib.pyplot as plt
 import matplotlib.pylab as plb
 from radmc3dPy import analyze, natconst
 
 
+# Fast zlib level for the PNGs (default 6 is several times slower, files
+# are somewhat larger)
+PNG_KWARGS = {'compress_level': 1}
+
+# Figure shared by all runs of this process (see _shared_figure)
+_reusable_fig = None
+
+
+def _shared_figure():
+    """
+    Figure reused by create_all_plots across runs, so parameter sweeps
+    do not build and tear down a figure for every model
+    """
+    global _reusable_fig
+    if _reusable_fig is None or not plt.fignum_exists(_reusable_fig.number):
+        _reusable_fig = plt.figure()
+    return _reusable_fig
+
+
+def _start_figure(fig=None):
+    """
+    Make fig the current figure after clearing it, or open a new figure
+    if fig is None
+    """
+    if fig is None:
+        return plt.figure()
+    fig.clf()
+    return plt.figure(fig.number)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_reference_sed(path, mtime_ns):
+    """
+    Read a reference SED file (cached per path and modification time,
+    batch runs plot the same file again and again)
+    """
+    data = np.loadtxt(path)
+    data.flags.writeable = False
+    return data
+
+
+def plot_axes(data):
+    """
+    Plot coordinates of a data object: r in AU and pi/2 - theta
+    
+    Single precision is plenty for a 300 dpi image and halves the
+    memory traffic through the contouring.
+    
+    Returns:
+    --------
+    r_au, theta_from_mid : array
+        float32 coordinate arrays
+    """
+    r_au = (data.grid.x / natconst.au).astype(np.float32)
+    theta_from_mid = (np.pi / 2. - data.grid.y).astype(np.float32)
+    return r_au, theta_from_mid
+
+
+def log_density(data):
+    """
+    log10 of the dust density (first azimuth and species), transposed for
+    plotting
+    
+    The log is written straight into a float32 buffer in one pass. Cells
+    without dust stay NaN instead of -inf, contourf leaves them blank.
+    
+    Returns:
+    --------
+    logrho : array
+        float32 array of shape (ntheta, nr)
+    """
+    rho = data.rhodust[:, :, 0, 0].T
+    logrho = np.full(rho.shape, np.nan, dtype=np.float32)
+    np.log10(rho, out=logrho, where=rho > 0)
+    return logrho
+
+
 def mirror_tauy(data):
     """
     Mirror tauy data across the midplane for symmetric representation. If you want
@@ -32,17 +111,18 @@ def mirror_tauy(data):
     
     tauy_symmetric = data.tauy.copy()
     
-    for i in range(theta_midplane_idx):
-        # Mirror the upper half to the lower half
-        mirror_idx = 2 * theta_midplane_idx - i
-        if mirror_idx < tauy_symmetric.shape[1]:
-            tauy_symmetric[:, mirror_idx, :] = data.tauy[:, i, :]
+    # Mirror the upper half to the lower half: theta index i goes to
+    # 2*mid - i, as far as the grid extends (one slice assignment)
+    mid = theta_midplane_idx
+    last = min(2 * mid, tauy_symmetric.shape[1] - 1)
+    if last > mid:
+        tauy_symmetric[:, mid + 1:last + 1, :] = data.tauy[:, 2 * mid - last:mid, :][:, ::-1, :]
     
     print("Mirroring completed")
     return tauy_symmetric
 
 
-def plot_sed(spec, star, grid, pc, run_dir, name, timestamp, reference_file=None):
+def plot_sed(spec, star, grid, pc, run_dir, name, timestamp, reference_file=None, fig=None):
     """
     Plot the Spectral Energy Distribution (SED)
     
@@ -64,16 +144,20 @@ def plot_sed(spec, star, grid, pc, run_dir, name, timestamp, reference_file=None
         Timestamp string for file naming
     reference_file : str, optional
         Path to reference SED file (e.g., 'ABAur_Dominik.txt')
+    fig : Figure, optional
+        Figure to clear and reuse (default: a new figure, closed afterwards)
     """
     
-    plt.figure()
+    own_fig = fig is None
+    fig = _start_figure(fig)
     plb.title(r'SED')
     plt.xscale('log')
     plt.yscale('log')
     
     # Plot reference SED if provided
     if reference_file is not None:
-        data = np.loadtxt(reference_file)
+        path = os.path.abspath(reference_file)
+        data = _load_reference_sed(path, os.stat(path).st_mtime_ns)
         x = data[:, 0]
         y = data[:, 1]
         plt.plot(x, y, label=f'{os.path.basename(reference_file)}')
@@ -101,13 +185,14 @@ def plot_sed(spec, star, grid, pc, run_dir, name, timestamp, reference_file=None
     plt.ylim(1e-15, 10**-6)
     plt.legend(loc='lower left')
     
-    filename = f"SED_{name}_{timestamp}.png"
-    plt.savefig(filename, dpi=250, bbox_inches='tight')
-    shutil.move(filename, os.path.join(run_dir, filename))
-    plt.close()
+    out_path = os.path.join(run_dir, f"SED_{name}_{timestamp}.png")
+    fig.savefig(out_path, dpi=250, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
+    if own_fig:
+        plt.close(fig)
 
 
-def plot_dust_density(data, run_dir, name, timestamp, wav=2.2):
+def plot_dust_density(data, run_dir, name, timestamp, wav=2.2, tauy_sym=None, fig=None,
+                      axes=None, logrho=None):
     """
     Plot dust density contours with tau=1 surface
     
@@ -123,17 +208,30 @@ def plot_dust_density(data, run_dir, name, timestamp, wav=2.2):
         Timestamp string for file naming
     wav : float
         Wavelength for optical depth calculation
+    tauy_sym : array, optional
+        Already mirrored tauy (default: mirrored here)
+    fig : Figure, optional
+        Figure to clear and reuse (default: a new figure, closed afterwards)
+    axes : tuple, optional
+        (r_au, theta_from_mid) from plot_axes (default: computed here)
+    logrho : array, optional
+        log10 density from log_density (default: computed here)
     """
     
     # Mirror tauy for symmetric representation
-    tauy_symmetric = mirror_tauy(data)
+    tauy_symmetric = mirror_tauy(data) if tauy_sym is None else tauy_sym
     
-    plb.figure()
+    r_au, theta = plot_axes(data) if axes is None else axes
+    if logrho is None:
+        logrho = log_density(data)
+    
+    own_fig = fig is None
+    fig = _start_figure(fig)
     plb.title(r'Dust density contours with $\tau=1$')
     c1 = plb.contourf(
-        data.grid.x / natconst.au,
-        np.pi / 2. - data.grid.y,
-        np.log10(data.rhodust[:, :, 0, 0].T),
+        r_au,
+        theta,
+        logrho,
         30
     )
     plb.xlabel('r [AU]')
@@ -143,22 +241,22 @@ def plot_dust_density(data, run_dir, name, timestamp, wav=2.2):
     cb.ax.yaxis.labelpad = 20
     cb.set_label(r'$\log_{10}{\rho}$', rotation=270.)
     c2 = plb.contour(
-        data.grid.x / natconst.au,
-        np.pi / 2. - data.grid.y,
-        tauy_symmetric[:, :, 0].T,
+        r_au,
+        theta,
+        tauy_symmetric[:, :, 0].T.astype(np.float32),
         [1.0],
         colors='w',
         linestyles='solid'
     )
     plb.clabel(c2, inline=1, fontsize=10, fmt='%g')
     
-    filename = f"dust_density_contours_{name}_{timestamp}.png"
-    plb.savefig(filename, dpi=300)
-    shutil.move(filename, os.path.join(run_dir, filename))
-    plb.close()
+    out_path = os.path.join(run_dir, f"dust_density_contours_{name}_{timestamp}.png")
+    fig.savefig(out_path, dpi=300, pil_kwargs=PNG_KWARGS)
+    if own_fig:
+        plt.close(fig)
 
 
-def plot_dust_temperature(data, run_dir, name, timestamp):
+def plot_dust_temperature(data, run_dir, name, timestamp, fig=None, axes=None):
     """
     Plot dust temperature contours
     
@@ -172,14 +270,22 @@ def plot_dust_temperature(data, run_dir, name, timestamp):
         Name identifier for this run
     timestamp : str
         Timestamp string for file naming
+    fig : Figure, optional
+        Figure to clear and reuse (default: a new figure, closed afterwards)
+    axes : tuple, optional
+        (r_au, theta_from_mid) from plot_axes (default: computed here)
     """
     
-    plb.figure()
+    r_au, theta = plot_axes(data) if axes is None else axes
+    temp = data.dusttemp[:, :, 0, 0].T.astype(np.float32)
+    
+    own_fig = fig is None
+    fig = _start_figure(fig)
     plb.title(r'Dust temperature contours')
     c3 = plb.contourf(
-        data.grid.x / natconst.au,
-        np.pi / 2. - data.grid.y,
-        data.dusttemp[:, :, 0, 0].T,
+        r_au,
+        theta,
+        temp,
         30
     )
     plb.xlabel('r [AU]')
@@ -188,9 +294,9 @@ def plot_dust_temperature(data, run_dir, name, timestamp):
     cb = plb.colorbar(c3)
     cb.set_label('T [K]', rotation=270.)
     c4 = plb.contour(
-        data.grid.x / natconst.au,
-        np.pi / 2. - data.grid.y,
-        data.dusttemp[:, :, 0, 0].T,
+        r_au,
+        theta,
+        temp,
         10,
         colors='k',
         linestyles='solid'
@@ -198,13 +304,14 @@ def plot_dust_temperature(data, run_dir, name, timestamp):
     plb.clabel(c4, inline=1, fontsize=10)
     cb.ax.yaxis.labelpad = 20
     
-    filename = f"dust_temperature_contours_{name}_{timestamp}.png"
-    plb.savefig(filename, dpi=300)
-    shutil.move(filename, os.path.join(run_dir, filename))
-    plb.close()
+    out_path = os.path.join(run_dir, f"dust_temperature_contours_{name}_{timestamp}.png")
+    fig.savefig(out_path, dpi=300, pil_kwargs=PNG_KWARGS)
+    if own_fig:
+        plt.close(fig)
 
 
-def plot_temp_dens_combined(data, data_dens, run_dir, name, timestamp):
+def plot_temp_dens_combined(data, data_dens, run_dir, name, timestamp, fig=None, axes=None,
+                            logrho=None):
     """
     Plot temperature and density structure combined
     
@@ -220,17 +327,29 @@ def plot_temp_dens_combined(data, data_dens, run_dir, name, timestamp):
         Name identifier for this run
     timestamp : str
         Timestamp string for file naming
+    fig : Figure, optional
+        Figure to clear and reuse (default: a new figure, closed afterwards)
+    axes : tuple, optional
+        (r_au, theta_from_mid) from plot_axes (default: computed here)
+    logrho : array, optional
+        log10 density of data_dens from log_density (default: computed here)
     """
     
-    plb.figure()
+    r_au, theta = plot_axes(data) if axes is None else axes
+    r_au_dens, theta_dens = (r_au, theta) if data_dens is data else plot_axes(data_dens)
+    if logrho is None:
+        logrho = log_density(data_dens)
+    
+    own_fig = fig is None
+    fig = _start_figure(fig)
     plb.title(r'Temperature and density structure')
     plt.xlim(0.5, 200)
     plt.ylim(0, 0.4)
     
     c5 = plb.contourf(
-        data_dens.grid.x / natconst.au,
-        np.pi / 2 - data_dens.grid.y,
-        np.log10(data_dens.rhodust[:, :, 0, 0].T),
+        r_au_dens,
+        theta_dens,
+        logrho,
         30
     )
     plb.xlabel('r [AU]')
@@ -239,21 +358,22 @@ def plot_temp_dens_combined(data, data_dens, run_dir, name, timestamp):
     plb.colorbar(c5, label=r'$\log_{10}(\rho)$')
     
     c_lines = plb.contour(
-        data.grid.x / natconst.au,
-        np.pi / 2 - data.grid.y,
-        data.dusttemp[:, :, 0, 0].T,
+        r_au,
+        theta,
+        data.dusttemp[:, :, 0, 0].T.astype(np.float32),
         30,
         linestyles='solid'
     )
     plb.clabel(c_lines, inline=1, fontsize=10)
     
-    filename = f"temperature_density_contours_{name}_{timestamp}.png"
-    plb.savefig(filename, dpi=300)
-    shutil.move(filename, os.path.join(run_dir, filename))
-    plb.close()
+    out_path = os.path.join(run_dir, f"temperature_density_contours_{name}_{timestamp}.png")
+    fig.savefig(out_path, dpi=300, pil_kwargs=PNG_KWARGS)
+    if own_fig:
+        plt.close(fig)
 
 
-def plot_density_zoom(data, run_dir, name, timestamp):
+def plot_density_zoom(data, run_dir, name, timestamp, tauy_sym=None, fig=None, axes=None,
+                      logrho=None):
     """
     Plot zoomed dust density contours with tau=1 surface
     
@@ -267,17 +387,30 @@ def plot_density_zoom(data, run_dir, name, timestamp):
         Name identifier for this run
     timestamp : str
         Timestamp string for file naming
+    tauy_sym : array, optional
+        Already mirrored tauy (default: mirrored here)
+    fig : Figure, optional
+        Figure to clear and reuse (default: a new figure, closed afterwards)
+    axes : tuple, optional
+        (r_au, theta_from_mid) from plot_axes (default: computed here)
+    logrho : array, optional
+        log10 density from log_density (default: computed here)
     """
     
     # Mirror tauy for symmetric representation
-    tauy_symmetric = mirror_tauy(data)
+    tauy_symmetric = mirror_tauy(data) if tauy_sym is None else tauy_sym
+    
+    r_au, theta = plot_axes(data) if axes is None else axes
+    if logrho is None:
+        logrho = log_density(data)
     
-    plb.figure()
+    own_fig = fig is None
+    fig = _start_figure(fig)
     plb.title(r'Dust density contours with $\tau=1$')
     c7 = plb.contourf(
-        data.grid.x / natconst.au,
-        np.pi / 2. - data.grid.y,
-        np.log10(data.rhodust[:, :, 0, 0].T),
+        r_au,
+        theta,
+        logrho,
         30
     )
     plb.xlabel('r [AU]')
@@ -287,9 +420,9 @@ def plot_density_zoom(data, run_dir, name, timestamp):
     cb.ax.yaxis.labelpad = 20
     cb.set_label(r'$\log_{10}{\rho}$', rotation=270.)
     c8 = plb.contour(
-        data.grid.x / natconst.au,
-        np.pi / 2. - data.grid.y,
-        tauy_symmetric[:, :, 0].T,
+        r_au,
+        theta,
+        tauy_symmetric[:, :, 0].T.astype(np.float32),
         [1.0],
         colors='w',
         linestyles='solid'
@@ -298,10 +431,10 @@ def plot_density_zoom(data, run_dir, name, timestamp):
     plt.ylim(0, 0.5)
     plt.xlim(0.5,)
     
-    filename = f"density_zoom_{name}_{timestamp}.png"
-    plb.savefig(filename, dpi=300)
-    shutil.move(filename, os.path.join(run_dir, filename))
-    plb.close()
+    out_path = os.path.join(run_dir, f"density_zoom_{name}_{timestamp}.png")
+    fig.savefig(out_path, dpi=300, pil_kwargs=PNG_KWARGS)
+    if own_fig:
+        plt.close(fig)
 
 
 def create_all_plots(run_dir, name, timestamp, pc, wav=2.2, reference_file=None):
@@ -329,21 +462,31 @@ def create_all_plots(run_dir, name, timestamp, pc, wav=2.2, reference_file=None)
     star = analyze.readStars()
     grid = analyze.readGrid()
     
+    # One figure, cleared and reused for all plots (and all runs of the batch)
+    fig = _shared_figure()
+    
     # Plot SED
-    plot_sed(spec, star, grid, pc, run_dir, name, timestamp, reference_file)
+    plot_sed(spec, star, grid, pc, run_dir, name, timestamp, reference_file, fig=fig)
     
     # Read data for density and temperature plots
     data = analyze.readData(dtemp=True, ddens=True)
     opac = analyze.readOpac(ext=['astrosilicateoptool'])
     data.getTau(wav=wav)
     
+    # Mirror tauy and compute the plot coordinates once for all contour plots
+    tauy_sym = mirror_tauy(data)
+    axes = plot_axes(data)
+    logrho = log_density(data)
+    
     # Create all contour plots
-    plot_dust_density(data, run_dir, name, timestamp, wav)
-    plot_dust_temperature(data, run_dir, name, timestamp)
+    plot_dust_density(data, run_dir, name, timestamp, wav, tauy_sym=tauy_sym, fig=fig, axes=axes,
+                      logrho=logrho)
+    plot_dust_temperature(data, run_dir, name, timestamp, fig=fig, axes=axes)
     
-    # Read density data separately for combined plot
-    data_dens = analyze.readData(ddens=True)
-    plot_temp_dens_combined(data, data_dens, run_dir, name, timestamp)
+    # data already holds the density, no need to read it a second time
+    plot_temp_dens_combined(data, data, run_dir, name, timestamp, fig=fig, axes=axes,
+                            logrho=logrho)
     
     # Create zoomed density plot
-    plot_density_zoom(data, run_dir, name, timestamp)
\ No newline at end of file
+    plot_density_zoom(data, run_dir, name, timestamp, tauy_sym=tauy_sym, fig=fig, axes=axes,
+                      logrho=logrho)
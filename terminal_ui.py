@@ -4,16 +4,21 @@ Includes basic helper functions and advanced progress tracking
 """
 
 import os
+import re
 import time
 import psutil
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+from rich.text import Text
 from rich import box
 
 console = Console()
 
+# A "[" that is not followed by any "]" (cannot be a markup tag)
+_UNCLOSED = re.compile(r'\[[^\]]*$')
+
 
 # ===========================================================================
 # BASIC UI FUNCTIONS (Banner, Messages, Tables)
@@ -120,12 +125,41 @@ def print_system_info():
 # ADVANCED PROGRESS TRACKER
 # ===========================================================================
 
+class SpaceBar(BarColumn):
+    """
+    Progress bar drawn as background-coloured spaces.
+    Needs two colour switches per frame instead of the multi-byte block
+    glyphs of BarColumn; indeterminate tasks keep BarColumn's pulse.
+    """
+    
+    def __init__(self, bar_width=40, complete_style="on green", back_style="on grey19"):
+        super().__init__(bar_width=bar_width)
+        self.complete_bg = complete_style
+        self.back_bg = back_style
+    
+    def render(self, task):
+        if task.total is None or not task.started:
+            return super().render(task)
+        
+        width = self.bar_width or 40
+        ratio = min(max(task.completed / task.total, 0.0), 1.0) if task.total else 1.0
+        filled = round(width * ratio)
+        
+        bar = Text(" " * filled, style=self.complete_bg, end="")
+        bar.append(" " * (width - filled), style=self.back_bg)
+        return bar
+
+
 class AdvancedPhaseTracker:
     """
     Advanced phase tracker with progress bars and real-time updates.
     Logs scroll naturally up, Progress bars stick to bottom.
     """
     
+    # Styled phase messages, parsed from markup once instead of on every call
+    _START_PREFIX = Text.from_markup("  [bold bright_green]→[/bold bright_green] Starting: ")
+    _DONE_PREFIX = Text.from_markup("  [bold bright_green]✓[/bold bright_green] Done: ")
+    
     def __init__(self, phases, estimated_times=None, max_log_lines=12):
         """
         Initialize the advanced phase tracker
@@ -140,26 +174,42 @@ class AdvancedPhaseTracker:
             Maximum number of log lines (unused, kept for compatibility)
         """
         self.phases = phases
+        self._phase_idx = {name: i for i, name in enumerate(phases)}
         self.estimated_times = estimated_times or {}
         self.current_phase_idx = -1
         self.start_time = time.time()
         self.phase_start_time = None
         self.phase_times = {}
         
+        # Under nohup, in CI or piped into a file there is nobody to watch a
+        # progress bar: Rich draws nothing and per-photon updates are skipped
+        self._interactive = console.is_terminal
+        
         # Standard Progress Bar (transient=False -> bars remain visible)
         self.progress = Progress(
             SpinnerColumn(),
             TextColumn("[bold blue]{task.description}"),
-            BarColumn(),
+            # Spaces are invisible without colour support
+            SpaceBar() if console.color_system else BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TextColumn("{task.completed}/{task.total}"), 
             TimeElapsedColumn(),
             console=console,
-            transient=False 
+            transient=False,
+            auto_refresh=True,
+            refresh_per_second=10,
+            disable=not self._interactive
         )
         
         self.overall_task = self.progress.add_task("Total", total=len(phases))
         self.phase_task = self.progress.add_task("Waiting...", total=None, visible=False)
+        
+        # update_progress only forwards to Rich at this rate (plus the final step)
+        self.min_update_interval = 1 / 30
+        self._last_update = 0.0
+        self._phase_total = None
+        # Last step held back by the throttle, sent on complete_phase
+        self._pending_step = None
 
     def start(self):
         """Start the progress tracker"""
@@ -169,29 +219,56 @@ class AdvancedPhaseTracker:
         """Stop the progress tracker"""
         self.progress.stop()
 
-    def log(self, message):
+    def log(self, message, markup=True):
         """
         Prints messages ABOVE the progress bar.
         Text scrolls naturally upward.
+        
+        Pass markup=False for raw text (e.g. RADMC-3D output): it is printed
+        as is, without running Rich's markup parser and highlighter.
         """
+        if not markup:
+            self.progress.console.print("  " + message, markup=False, highlight=False)
+            return
+        
         # Escape square brackets if they appear without closing brackets
-        if "[" in message and "]" not in message:
-            message = message.replace("[", "\\[")
+        message = _UNCLOSED.sub(lambda m: "\\" + m.group(), message)
             
         # Print without dim - let RADMC output be readable
         self.progress.console.print(f"  {message}")
 
     def set_phase_total(self, total_steps):
         """Sets maximum for current phase (e.g., total photons)"""
+        self._phase_total = total_steps
+        if not self._interactive:
+            return
         self.progress.update(self.phase_task, total=total_steps, completed=0)
 
     def update_progress(self, step):
-        """Updates current progress value (e.g., current photon number)"""
-        self.progress.update(self.phase_task, completed=step)
+        """
+        Updates current progress value (e.g., current photon number)
+        
+        Called for every photon line, so calls are coalesced: Rich only sees
+        one update per min_update_interval, and always the last step.
+        """
+        if not self._interactive:
+            return
+        now = time.monotonic()
+        if (now - self._last_update < self.min_update_interval
+                and (self._phase_total is None or step < self._phase_total)):
+            self._pending_step = step
+            return
+        self._last_update = now
+        self._pending_step = None
+        # No redraw here; the Live display repaints on its own refresh thread
+        self.progress.update(self.phase_task, completed=step, refresh=False)
 
     def start_phase(self, phase_name):
         """Start a new phase"""
-        self.current_phase_idx = self.phases.index(phase_name)
+        try:
+            self.current_phase_idx = self._phase_idx[phase_name]
+        except KeyError:
+            raise ValueError(f"Unknown phase {phase_name!r}; expected one of {self.phases}") from None
         self.phase_start_time = time.time()
         
         self.progress.update(self.overall_task, completed=self.current_phase_idx)
@@ -201,22 +278,32 @@ class AdvancedPhaseTracker:
         if estimated:
             desc += f" (~{estimated} min)"
             
-        # Reset task to "indeterminate" (spinner) until set_phase_total is called
-        self.progress.reset(self.phase_task)
-        self.progress.update(self.phase_task, description=desc, total=None, visible=True)
+        # Restart the phase task (count and clock) under the new description;
+        # one reset call takes the lock and redraws once
+        self._phase_total = None
+        self._pending_step = None
+        self.progress.reset(self.phase_task, description=desc, visible=True)
         
-        self.log(f"[bold bright_green]→[/bold bright_green] Starting: [bold bright_green]{phase_name}[/bold bright_green]")
+        self.progress.console.print(Text.assemble(self._START_PREFIX, (phase_name, "bold bright_green")))
 
     def complete_phase(self, phase_name):
         """Complete current phase"""
         if self.phase_start_time:
             duration = time.time() - self.phase_start_time
             self.phase_times[phase_name] = duration
-            duration_str = f"{int(duration)}s"
-            self.log(f"[bold bright_green]✓[/bold bright_green] Done: [bold]{phase_name}[/bold] [bright_green]({duration_str})[/bright_green]")
+            duration_str = f"{duration:.0f}s"
+            self.progress.console.print(Text.assemble(
+                self._DONE_PREFIX, (phase_name, "bold"), " ", (f"({duration_str})", "bright_green")
+            ))
+        
+        # Send the last throttled step first, so the final count is shown
+        if self._pending_step is not None:
+            self.progress.update(self.phase_task, completed=self._pending_step, refresh=False)
+            self._pending_step = None
         
         self.progress.update(self.overall_task, completed=self.current_phase_idx + 1)
-        self.progress.update(self.phase_task, completed=100)
+        done = self._phase_total if self._phase_total is not None else 100
+        self.progress.update(self.phase_task, completed=done)
 
     def get_total_time(self):
         """Get total elapsed time in seconds"""
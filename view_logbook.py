@@ -3,56 +3,73 @@
 View and search the simulation logbook
 """
 
+import re
 import sys
-from export import view_logbook, SimulationLogbook
+
+# Literal types of search values ("0.01*ms" and other expressions stay strings)
+_INT_RE = re.compile(r'[-+]?\d+$')
+_FLOAT_RE = re.compile(r'[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')
 
 if __name__ == "__main__":
+    # export (pandas/pyarrow) is imported per command, so 'help' starts instantly
     if len(sys.argv) > 1:
         command = sys.argv[1]
         
         if command == "view":
             # View last N simulations
+            from export import view_logbook
             n = int(sys.argv[2]) if len(sys.argv) > 2 else 20
             view_logbook(last_n=n)
         
         elif command == "search":
             # Search for specific parameters
             # Example: python view_logbook.py search mdisk=0.01*ms n_arms=2
+            from export import SimulationLogbook
             logbook = SimulationLogbook()
             criteria = {}
             for arg in sys.argv[2:]:
                 if '=' in arg:
                     key, value = arg.split('=', 1)
-                    # Try to convert to appropriate type
-                    try:
+                    # Convert to appropriate type
+                    if _INT_RE.match(value):
                         value = int(value)
-                    except:
-                        try:
-                            value = float(value)
-                        except:
-                            pass  # Keep as string
+                    elif _FLOAT_RE.match(value):
+                        value = float(value)
                     criteria[key] = value
             
-            results = logbook.search(**criteria)
+            # Only the printed columns are read from the part files
+            display_cols = ['Timestamp', 'Name', 'Status', 'Runtime_min', 
+                            'mdisk', 'hrdisk', 'h_spiral_amp']
+            results = logbook.search(columns=display_cols, **criteria)
             if results is not None and len(results) > 0:
                 print(f"\nFound {len(results)} matching simulations:")
-                print(results[['Timestamp', 'Name', 'Status', 'Runtime_min', 
-                              'mdisk', 'hrdisk', 'h_spiral_amp']].to_string(index=False))
+                print(results.to_string(index=False))
             else:
                 print("No matching simulations found.")
         
         elif command == "export":
             # Export to CSV
+            from export import SimulationLogbook
             output = sys.argv[2] if len(sys.argv) > 2 else "simulation_logbook.csv"
             logbook = SimulationLogbook()
             logbook.export_to_csv(output)
         
+        elif command == "compile":
+            # Rebuild the Excel logbook from the part files
+            from export import SimulationLogbook
+            logbook = SimulationLogbook()
+            if logbook.compile() is not None:
+                print(f"Compiled: {logbook.logbook_path}")
+            else:
+                print("No logbook found yet.")
+        
         elif command == "help":
             print(__doc__)
             print("\nUsage:")
             print("  python view_logbook.py view [N]           - View last N simulations (default 20)")
             print("  python view_logbook.py search key=value   - Search for specific parameters")
             print("  python view_logbook.py export [file.csv]  - Export logbook to CSV")
+            print("  python view_logbook.py compile            - Rebuild the Excel logbook")
             print("\nExamples:")
             print("  python view_logbook.py view 50")
             print("  python view_logbook.py search mdisk=\"0.01*ms\" n_arms=2")
@@ -64,4 +81,5 @@ if __name__ == "__main__":
     
     else:
         # Default: show last 20
+        from export import view_logbook
         view_logbook(last_n=20)